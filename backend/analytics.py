@@ -0,0 +1,179 @@
+"""
+Attendance analytics for Student Life Management System
+Aggregates roll-call entries held as parallel NumPy arrays instead of ORM
+objects. main.py loads a term's entries with load_attendance_frame and
+serves the reports built here.
+
+Entries travel from the database packed: one row per roll call whose text
+is every entry encoded as a fixed-width decimal (PACK_BASE + student_id * 4
++ status code), so the database concatenates and NumPy decodes without a
+Python object per entry.
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+
+PRESENT, LATE, ABSENT, EXCUSED = range(4)
+STATUS_CODES = {"present": PRESENT, "late": LATE, "absent": ABSENT, "excused": EXCUSED}
+
+PACK_BASE = 10 ** 9
+PACK_WIDTH = 10
+_PACK_DIGITS = 10 ** np.arange(PACK_WIDTH - 1, -1, -1, dtype=np.int64)
+
+@dataclass
+class AttendanceFrame:
+    """Roll calls as columns, plus one row per entry pointing at its roll call."""
+    roll_call_ids: np.ndarray
+    scheduled_times: np.ndarray
+    location_ids: np.ndarray
+    instructor_ids: np.ndarray
+    entry_roll_calls: np.ndarray
+    entry_students: np.ndarray
+    entry_statuses: np.ndarray
+
+def decode_entries(packed: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Split one roll call's packed text into (student_ids, status codes)."""
+    digits = np.frombuffer(packed.encode("ascii"), dtype=np.uint8).reshape(-1, PACK_WIDTH) - ord("0")
+    values = digits.astype(np.int64) @ _PACK_DIGITS - PACK_BASE
+    return values >> 2, (values & 3).astype(np.int8)
+
+def build_frame(roll_calls: Iterable[tuple], packed_entries: Iterable[tuple]) -> AttendanceFrame:
+    """roll_calls: (id, scheduled_time, location_id, conducted_by) rows;
+    packed_entries: (roll_call_id, packed text) rows."""
+    roll_calls = list(roll_calls)
+    roll_call_ids = np.array([row[0] for row in roll_calls], dtype=np.int64)
+    index = {roll_call_id: n for n, roll_call_id in enumerate(roll_call_ids.tolist())}
+    entry_roll_calls, entry_students, entry_statuses = [], [], []
+    for roll_call_id, packed in packed_entries:
+        if not packed or roll_call_id not in index:
+            continue
+        students, statuses = decode_entries(packed)
+        entry_roll_calls.append(np.full(len(students), index[roll_call_id], dtype=np.int64))
+        entry_students.append(students)
+        entry_statuses.append(statuses)
+    return AttendanceFrame(
+        roll_call_ids=roll_call_ids,
+        scheduled_times=np.array([row[1] for row in roll_calls], dtype="datetime64[s]"),
+        # 0 stands for "no location"; ids start at 1
+        location_ids=np.array([row[2] or 0 for row in roll_calls], dtype=np.int64),
+        instructor_ids=np.array([row[3] for row in roll_calls], dtype=np.int64),
+        entry_roll_calls=np.concatenate(entry_roll_calls) if entry_roll_calls else np.zeros(0, np.int64),
+        entry_students=np.concatenate(entry_students) if entry_students else np.zeros(0, np.int64),
+        entry_statuses=np.concatenate(entry_statuses) if entry_statuses else np.zeros(0, np.int8),
+    )
+
+def _rates(counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Attendance (present + late) and absence rates over non-excused entries; NaN when none."""
+    counted = counts[:, PRESENT] + counts[:, LATE] + counts[:, ABSENT]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        attended = (counts[:, PRESENT] + counts[:, LATE]) / counted
+        absent = counts[:, ABSENT] / counted
+    return attended, absent
+
+def _rate(value: float) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 4)
+
+def _counts(row: np.ndarray) -> dict:
+    return {
+        "entries": int(row.sum()),
+        "present": int(row[PRESENT]),
+        "late": int(row[LATE]),
+        "absent": int(row[ABSENT]),
+        "excused": int(row[EXCUSED]),
+    }
+
+def late_streaks(students: np.ndarray, statuses: np.ndarray, order: np.ndarray, num_students: int):
+    """Longest and current run of consecutive "late" entries per student.
+
+    `students` are dense indexes and `order` sorts entries by student, then
+    time. A run starts at every late entry whose predecessor is not a late
+    entry of the same student.
+    """
+    students = students[order]
+    late = statuses[order] == LATE
+    longest = np.zeros(num_students, dtype=np.int64)
+    current = np.zeros(num_students, dtype=np.int64)
+    if not len(late):
+        return longest, current
+    same_student = np.empty(len(late), dtype=bool)
+    same_student[0] = False
+    same_student[1:] = students[1:] == students[:-1]
+    previous_late = np.empty(len(late), dtype=bool)
+    previous_late[0] = False
+    previous_late[1:] = late[:-1]
+    starts = late & ~(previous_late & same_student)
+    run_ids = np.cumsum(starts) - 1
+    run_lengths = np.bincount(run_ids[late], minlength=int(starts.sum()))
+    np.maximum.at(longest, students[starts], run_lengths)
+    # Current streak: the run that reaches each student's last entry
+    last = np.empty(len(late), dtype=bool)
+    last[-1] = True
+    last[:-1] = students[1:] != students[:-1]
+    ongoing = last & late
+    current[students[ongoing]] = run_lengths[run_ids[ongoing]]
+    return longest, current
+
+def student_report(frame: AttendanceFrame, chronic_absence_rate: float) -> List[dict]:
+    student_ids, students = np.unique(frame.entry_students, return_inverse=True)
+    counts = np.bincount(
+        students * 4 + frame.entry_statuses, minlength=len(student_ids) * 4
+    ).reshape(-1, 4)
+    attended, absent = _rates(counts)
+    # Rank roll calls by time so streaks follow the order they happened in
+    time_rank = np.empty(len(frame.roll_call_ids), dtype=np.int64)
+    time_rank[np.lexsort((frame.roll_call_ids, frame.scheduled_times))] = np.arange(len(frame.roll_call_ids))
+    order = np.lexsort((time_rank[frame.entry_roll_calls], students))
+    longest, current = late_streaks(students, frame.entry_statuses, order, len(student_ids))
+    chronic = absent >= chronic_absence_rate
+    return [
+        {
+            "student_id": int(student_ids[n]),
+            **_counts(counts[n]),
+            "attendance_rate": _rate(attended[n]),
+            "absence_rate": _rate(absent[n]),
+            "longest_late_streak": int(longest[n]),
+            "current_late_streak": int(current[n]),
+            "chronic_absence": bool(chronic[n]),
+        }
+        for n in range(len(student_ids))
+    ]
+
+def bucket_starts(scheduled_times: np.ndarray, bucket: str) -> np.ndarray:
+    """The day, or the Monday of the week, each time falls in."""
+    days = scheduled_times.astype("datetime64[D]")
+    if bucket == "week":
+        # Day 0 (1970-01-01) was a Thursday
+        days = days - (days.astype(np.int64) + 3) % 7
+    return days
+
+def trend_report(frame: AttendanceFrame, group_ids: np.ndarray, bucket: str) -> List[Tuple[int, object, dict]]:
+    """Counts and rates per (group, bucket); group_ids has one value per roll call.
+
+    Returns (group_id, bucket start date, fields) sorted by group, then date.
+    """
+    num_roll_calls = len(frame.roll_call_ids)
+    per_roll_call = np.bincount(
+        frame.entry_roll_calls * 4 + frame.entry_statuses, minlength=num_roll_calls * 4
+    ).reshape(-1, 4)
+    days = bucket_starts(frame.scheduled_times, bucket)
+    keys = np.stack([group_ids, days.astype(np.int64)], axis=1)
+    groups, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    counts = np.zeros((len(groups), 4), dtype=np.int64)
+    np.add.at(counts, inverse, per_roll_call)
+    roll_calls = np.bincount(inverse, minlength=len(groups))
+    attended, absent = _rates(counts)
+    return [
+        (
+            int(groups[n, 0]),
+            np.datetime64(int(groups[n, 1]), "D").item(),
+            {
+                "roll_calls": int(roll_calls[n]),
+                **_counts(counts[n]),
+                "attendance_rate": _rate(attended[n]),
+                "absence_rate": _rate(absent[n]),
+            },
+        )
+        for n in range(len(groups))
+    ]
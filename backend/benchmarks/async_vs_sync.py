@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Sync vs async request path benchmark for Student Life Management System
+Serves the same location listing query through a sync handler (Session in the
+threadpool) and an async handler (AsyncSession on the event loop) and drives
+both with the same number of concurrent clients.
+
+Each statement sleeps --db-latency-ms inside the database driver thread to
+stand in for the network round trip to a production database, which is what
+keeps a sync request holding its threadpool slot.
+
+Usage:
+    python benchmarks/async_vs_sync.py [--concurrency 200] [--requests 2000] [--db-latency-ms 20]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="slms-bench-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, BACKEND_DIR)
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from main import Location, LocationResponse, SessionLocal
+from typing import List
+
+def build_app(concurrency: int, latency_ms: int) -> FastAPI:
+    def add_sleep_function(dbapi_connection, connection_record):
+        def bench_sleep(ms):
+            time.sleep(ms / 1000)
+            return 0
+        dbapi_connection.create_function("bench_sleep", 1, bench_sleep)
+
+    # Both paths get a pool wide enough that only the execution model differs.
+    sync_engine = create_engine(
+        f"sqlite:///{DB_PATH}", connect_args={"check_same_thread": False},
+        pool_size=concurrency, max_overflow=0
+    )
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{DB_PATH}", pool_size=concurrency, max_overflow=0
+    )
+    event.listen(sync_engine, "connect", add_sleep_function)
+    event.listen(async_engine.sync_engine, "connect", add_sleep_function)
+    SyncSession = sessionmaker(bind=sync_engine)
+    AsyncSessionMaker = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    def get_sync_db():
+        db = SyncSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with AsyncSessionMaker() as db:
+            yield db
+
+    app = FastAPI()
+
+    @app.get("/sync/locations", response_model=List[LocationResponse])
+    def sync_locations(db: Session = Depends(get_sync_db)):
+        return db.query(Location).filter(func.bench_sleep(latency_ms) == 0).limit(20).all()
+
+    @app.get("/async/locations", response_model=List[LocationResponse])
+    async def async_locations(db: AsyncSession = Depends(get_async_db)):
+        stmt = select(Location).filter(func.bench_sleep(latency_ms) == 0).limit(20)
+        return (await db.scalars(stmt)).all()
+
+    return app
+
+async def drive(app: FastAPI, path: str, total: int, concurrency: int):
+    latencies = []
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    async def client_loop(client):
+        while not queue.empty():
+            queue.get_nowait()
+            start = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get(path)
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "throughput": total / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--db-latency-ms", type=int, default=20)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    db.add_all([Location(name=f"Location {i}", building="A") for i in range(50)])
+    db.commit()
+    db.close()
+
+    app = build_app(args.concurrency, args.db_latency_ms)
+    print(
+        f"{args.requests} requests, {args.concurrency} concurrent clients, "
+        f"{args.db_latency_ms} ms simulated DB latency"
+    )
+    for label, path in (("sync handler", "/sync/locations"), ("async handler", "/async/locations")):
+        stats = asyncio.run(drive(app, path, args.requests, args.concurrency))
+        print(
+            f"{label:<14} {stats['throughput']:8.1f} req/s  "
+            f"p50 {stats['p50_ms']:8.2f} ms  p99 {stats['p99_ms']:8.2f} ms"
+        )
+
+if __name__ == "__main__":
+    main()
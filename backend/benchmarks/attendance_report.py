@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Attendance report benchmark for Student Life Management System
+Seeds a term of roll calls (--roll-calls-per-day over --days, each with an
+entry for every student) on a fresh SQLite database and times the
+attendance report endpoints over the whole term.
+
+Usage:
+    python benchmarks/attendance_report.py [--students 2000] [--roll-calls-per-day 6] [--days 90] [--runs 5]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="slms-bench-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, BACKEND_DIR)
+
+import httpx
+from datetime import datetime, timedelta
+from main import app, engine, User, Location, RollCall, RollCallEntry, create_access_token
+
+TERM_START = datetime(2025, 1, 6, 8, 0)
+NUM_INSTRUCTORS = 10
+
+def seed(num_students: int, per_day: int, days: int):
+    rng = random.Random(7)
+    statuses = ["present"] * 85 + ["late"] * 8 + ["absent"] * 5 + ["excused"] * 2
+    with engine.begin() as conn:
+        conn.execute(Location.__table__.insert(), [
+            {"id": n + 1, "name": f"Location {n}", "building": "A", "is_active": True} for n in range(per_day)
+        ])
+        conn.execute(User.__table__.insert(), [
+            {
+                "id": n + 1,
+                "email": f"instructor{n}@school.edu",
+                "username": f"instructor{n}",
+                "full_name": f"Instructor {n}",
+                "hashed_password": "x",
+                "role": "administrator" if n == 0 else "instructor",
+                "is_active": True,
+            }
+            for n in range(NUM_INSTRUCTORS)
+        ])
+        conn.execute(User.__table__.insert(), [
+            {
+                "id": NUM_INSTRUCTORS + i + 1,
+                "email": f"student{i}@school.edu",
+                "username": f"student{i}",
+                "full_name": f"Student {i}",
+                "hashed_password": "x",
+                "role": "student",
+                "is_active": True,
+            }
+            for i in range(num_students)
+        ])
+        roll_calls = [
+            {
+                "id": day * per_day + n + 1,
+                "name": f"Day {day} slot {n}",
+                "location_id": n + 1,
+                "conducted_by": (day + n) % NUM_INSTRUCTORS + 1,
+                "scheduled_time": TERM_START + timedelta(days=day, hours=n),
+                "activated_at": TERM_START + timedelta(days=day, hours=n),
+                "is_active": True,
+            }
+            for day in range(days)
+            for n in range(per_day)
+        ]
+        conn.execute(RollCall.__table__.insert(), roll_calls)
+        for roll_call in roll_calls:
+            conn.execute(RollCallEntry.__table__.insert(), [
+                {
+                    "roll_call_id": roll_call["id"],
+                    "student_id": NUM_INSTRUCTORS + i + 1,
+                    "status": rng.choice(statuses),
+                    "marked_by": roll_call["conducted_by"],
+                }
+                for i in range(num_students)
+            ])
+    return len(roll_calls) * num_students
+
+async def run(days: int, runs: int):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': '1'})}"}
+    params = {"start": TERM_START.isoformat(), "end": (TERM_START + timedelta(days=days)).isoformat()}
+    paths = (
+        "/instructor/reports/attendance/students",
+        "/instructor/reports/attendance/locations",
+        "/admin/reports/attendance/instructors",
+    )
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers, timeout=60) as client:
+        for path in paths:
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                response = await client.get(path, params=params)
+                timings.append(time.perf_counter() - start)
+                response.raise_for_status()
+            timings.sort()
+            results[path] = (len(response.json()), timings[len(timings) // 2], timings[-1])
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--roll-calls-per-day", type=int, default=6)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    entries = seed(args.students, args.roll_calls_per_day, args.days)
+    print(f"{args.students} students x {args.roll_calls_per_day} roll calls/day x {args.days} days = {entries} entries")
+    for path, (rows, p50, worst) in asyncio.run(run(args.days, args.runs)).items():
+        print(f"{path:<44} {rows:5d} rows  p50 {p50 * 1000:8.2f} ms  max {worst * 1000:8.2f} ms")
+
+if __name__ == "__main__":
+    main()
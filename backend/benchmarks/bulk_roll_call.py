@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Bulk roll-call marking benchmark for Student Life Management System
+Marks a whole assembly through PUT /instructor/roll-calls/{id}/entries on a
+fresh SQLite database and reports the request time for the first pass
+(inserts) and for repeat passes (conflicting upserts).
+
+Usage:
+    python benchmarks/bulk_roll_call.py [--students 1000] [--runs 20]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="slms-bench-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, BACKEND_DIR)
+
+import httpx
+from datetime import datetime
+from main import app, engine, User, RollCall, create_access_token
+
+def seed(num_students: int):
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{
+            "id": 1,
+            "email": "instructor@school.edu",
+            "username": "instructor",
+            "full_name": "Bench Instructor",
+            "hashed_password": "x",
+            "role": "instructor",
+            "is_active": True,
+        }])
+        conn.execute(User.__table__.insert(), [
+            {
+                "id": i + 2,
+                "email": f"student{i}@school.edu",
+                "username": f"student{i}",
+                "full_name": f"Student {i}",
+                "hashed_password": "x",
+                "role": "student",
+                "is_active": True,
+            }
+            for i in range(num_students)
+        ])
+        conn.execute(RollCall.__table__.insert(), [{
+            "id": 1,
+            "name": "Assembly",
+            "conducted_by": 1,
+            "scheduled_time": datetime.utcnow(),
+            "is_active": True,
+        }])
+
+async def run(num_students: int, runs: int):
+    rng = random.Random(7)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': '1'})}"}
+    statuses = ["present", "present", "present", "late", "absent", "excused"]
+    timings = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        await client.get("/instructor/roll-calls")
+        for _ in range(runs):
+            entries = {str(i + 2): rng.choice(statuses) for i in range(num_students)}
+            start = time.perf_counter()
+            response = await client.put("/instructor/roll-calls/1/entries", json={"entries": entries})
+            timings.append(time.perf_counter() - start)
+            response.raise_for_status()
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    seed(args.students)
+    timings = asyncio.run(run(args.students, args.runs))
+    upserts = sorted(timings[1:])
+    print(f"Marking {args.students} students per request")
+    print(f"first pass (insert)   {timings[0] * 1000:8.2f} ms")
+    if upserts:
+        print(f"repeat pass p50       {upserts[len(upserts) // 2] * 1000:8.2f} ms")
+        print(f"repeat pass max       {upserts[-1] * 1000:8.2f} ms")
+
+if __name__ == "__main__":
+    main()
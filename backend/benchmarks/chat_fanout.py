@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Group chat fan-out benchmark for Student Life Management System
+Starts real uvicorn workers on a fresh SQLite database, connects one
+WebSocket per chat member, posts messages at a fixed rate and reports the
+post-to-delivery latency across every member socket. Member sockets are
+spread over --clients processes so the client side is not the bottleneck.
+
+The "in-process" run uses a single worker and the default PubSubHub. The
+"broker" run starts chat_broker.py and --workers workers, spreads the member
+sockets across them and posts through the first one, so most deliveries
+cross a worker boundary.
+
+Usage:
+    python benchmarks/chat_fanout.py [--members 500] [--rate 20] [--seconds 10] [--workers 2] [--clients 4]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="slms-bench-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, BACKEND_DIR)
+
+import httpx
+import websockets
+from main import engine, User, GroupChat, GroupChatMember, create_access_token
+
+BASE_PORT = 8710
+BROKER_PORT = 7410
+
+def seed(num_members: int):
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{
+            "id": 1,
+            "email": "instructor@school.edu",
+            "username": "instructor",
+            "full_name": "Bench Instructor",
+            "hashed_password": "x",
+            "role": "instructor",
+            "is_active": True,
+        }])
+        conn.execute(User.__table__.insert(), [
+            {
+                "id": i + 2,
+                "email": f"student{i}@school.edu",
+                "username": f"student{i}",
+                "full_name": f"Student {i}",
+                "hashed_password": "x",
+                "role": "student",
+                "is_active": True,
+            }
+            for i in range(num_members)
+        ])
+        conn.execute(GroupChat.__table__.insert(), [{"id": 1, "name": "Bench chat", "created_by": 1}])
+        conn.execute(GroupChatMember.__table__.insert(), [
+            {"group_chat_id": 1, "user_id": user_id} for user_id in range(1, num_members + 2)
+        ])
+
+def start_processes(num_workers: int, broker: bool):
+    env = dict(os.environ)
+    processes = []
+    if broker:
+        env["CHAT_BROKER_URL"] = f"tcp://127.0.0.1:{BROKER_PORT}"
+        processes.append(subprocess.Popen(
+            [sys.executable, "chat_broker.py", "--port", str(BROKER_PORT)],
+            cwd=BACKEND_DIR, env=env, stderr=subprocess.DEVNULL
+        ))
+        time.sleep(0.5)
+    for n in range(num_workers):
+        processes.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(BASE_PORT + n), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env
+        ))
+    for n in range(num_workers):
+        for _ in range(100):
+            try:
+                httpx.get(f"http://127.0.0.1:{BASE_PORT + n}/health").raise_for_status()
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+    return processes
+
+async def receive_all(urls, total: int, timeout: float, ready):
+    latencies = []
+
+    async def receive(websocket):
+        received = 0
+        while received < total:
+            frame = json.loads(await websocket.recv())
+            if frame["type"] == "message":
+                latencies.append(time.time() - float(frame["message"]["body"]))
+                received += 1
+
+    sockets = [await websockets.connect(url) for url in urls]
+    ready.set()
+    try:
+        await asyncio.wait_for(asyncio.gather(*(receive(websocket) for websocket in sockets)), timeout)
+    except asyncio.TimeoutError:
+        pass
+    for websocket in sockets:
+        await websocket.close()
+    return latencies
+
+def receiver_process(urls, total, timeout, ready, results):
+    results.put(asyncio.run(receive_all(urls, total, timeout, ready)))
+
+async def send(rate: float, total: int):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': '1'})}"}
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{BASE_PORT}", headers=headers) as client:
+        start = time.perf_counter()
+        for seq in range(total):
+            await asyncio.sleep(max(0.0, start + seq / rate - time.perf_counter()))
+            response = await client.post("/common/group-chats/1/messages", json={"body": repr(time.time())})
+            response.raise_for_status()
+
+def run(num_members: int, num_workers: int, num_clients: int, rate: float, seconds: float):
+    """Member sockets live in num_clients processes so the client side is not the bottleneck."""
+    total = int(rate * seconds)
+    urls = [
+        f"ws://127.0.0.1:{BASE_PORT + n % num_workers}/common/group-chats/1/ws"
+        f"?token={create_access_token({'sub': str(user_id)})}"
+        for n, user_id in enumerate(range(2, num_members + 2))
+    ]
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    clients = []
+    for n in range(num_clients):
+        ready = context.Event()
+        process = context.Process(
+            target=receiver_process, args=(urls[n::num_clients], total, seconds + 5, ready, results)
+        )
+        process.start()
+        clients.append((process, ready))
+    for _, ready in clients:
+        ready.wait()
+
+    asyncio.run(send(rate, total))
+    latencies = []
+    for _ in clients:
+        latencies.extend(results.get())
+    for process, _ in clients:
+        process.join()
+
+    latencies.sort()
+    return {
+        "expected": total * len(urls),
+        "delivered": len(latencies),
+        "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else None,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else None,
+        "max_ms": latencies[-1] * 1000 if latencies else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=500)
+    parser.add_argument("--rate", type=float, default=20, help="messages per second")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=2, help="workers for the broker run")
+    parser.add_argument("--clients", type=int, default=4, help="processes holding the member sockets")
+    args = parser.parse_args()
+
+    seed(args.members)
+    print(f"{args.members} members, {args.rate:g} messages/s for {args.seconds:g} s")
+    for label, num_workers, broker in (("in-process", 1, False), (f"broker x{args.workers}", args.workers, True)):
+        processes = start_processes(num_workers, broker)
+        try:
+            stats = run(args.members, num_workers, args.clients, args.rate, args.seconds)
+        finally:
+            for process in reversed(processes):
+                process.terminate()
+                process.wait()
+        print(
+            f"{label:<12} delivered {stats['delivered']}/{stats['expected']}  "
+            f"p50 {stats['p50_ms'] or 0:7.2f} ms  p99 {stats['p99_ms'] or 0:7.2f} ms  "
+            f"max {stats['max_ms'] or 0:7.2f} ms"
+        )
+
+if __name__ == "__main__":
+    main()
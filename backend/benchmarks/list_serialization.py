@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+List serialization microbenchmark for Student Life Management System
+Loads --rows users and locations as the list routes do (column projections)
+and times turning them into the response body two ways: what FastAPI does
+with response_model (validate every row into UserResponse / LocationResponse,
+then dump JSON) and what list_response does with FAST_JSON_RESPONSES=true
+(orjson straight from the rows). Checks both produce the same JSON.
+
+Usage:
+    python benchmarks/list_serialization.py [--rows 1000,10000] [--runs 7]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="slms-bench-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, BACKEND_DIR)
+
+import orjson
+from pydantic import TypeAdapter
+from typing import List
+from sqlalchemy import select
+from main import (
+    LOCATION_RESPONSE_COLUMNS, USER_RESPONSE_COLUMNS, Location, LocationResponse, User, UserResponse, engine
+)
+
+def seed(num_rows: int):
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {
+                "email": f"student{i}@school.edu",
+                "username": f"student{i}",
+                "full_name": f"Student {i}",
+                "hashed_password": "x",
+                "role": "student",
+                "is_active": True,
+                "grade": "10",
+                "student_id": f"S{i:06d}",
+            }
+            for i in range(num_rows)
+        ])
+        conn.execute(Location.__table__.insert(), [
+            {"name": f"Location {i}", "description": f"Room {i}", "building": "A", "is_active": True}
+            for i in range(num_rows)
+        ])
+
+def median_time(fn, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="1000,10000")
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.rows.split(",")]
+    seed(max(sizes))
+    print(f"median of {args.runs} runs")
+    for model, columns in ((UserResponse, USER_RESPONSE_COLUMNS), (LocationResponse, LOCATION_RESPONSE_COLUMNS)):
+        adapter = TypeAdapter(List[model])
+        for size in sizes:
+            with engine.connect() as conn:
+                rows = conn.execute(select(*columns).order_by(columns[0].table.c.id).limit(size)).all()
+
+            def validated():
+                return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+            def fast():
+                return orjson.dumps([row._asdict() for row in rows], option=orjson.OPT_UTC_Z)
+
+            assert json.loads(validated()) == json.loads(fast())
+            slow, quick = median_time(validated, args.runs), median_time(fast, args.runs)
+            print(
+                f"{model.__name__:<17} {size:6d} rows  response_model {slow * 1000:8.2f} ms  "
+                f"orjson {quick * 1000:7.2f} ms  {slow / quick:5.1f}x"
+            )
+
+if __name__ == "__main__":
+    main()
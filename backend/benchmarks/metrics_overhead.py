@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Request metrics overhead benchmark for Student Life Management System
+Drives a cheap route (/health) and an authenticated DB-backed route
+(/common/locations) with metrics and SQL instrumentation off, then on, each
+in a fresh process and database, and reports the per-request time.
+
+Usage:
+    python benchmarks/metrics_overhead.py [--requests 5000] [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATHS = ("/health", "/common/locations")
+
+def run_worker(args):
+    sys.path.insert(0, BACKEND_DIR)
+    import asyncio
+    import time
+    import httpx
+    from main import app, SessionLocal, User, Location, create_access_token
+
+    db = SessionLocal()
+    db.add(User(email="student@school.edu", username="student", full_name="Student", hashed_password="x", role="student"))
+    db.add_all([Location(name=f"Location {i}", building="A") for i in range(20)])
+    db.commit()
+    db.close()
+
+    async def drive():
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': '1'})}"}
+        results = {}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+            for path in PATHS:
+                await client.get(path)
+                runs = []
+                for _ in range(args.runs):
+                    start = time.perf_counter()
+                    for _ in range(args.requests):
+                        response = await client.get(path)
+                    runs.append((time.perf_counter() - start) / args.requests)
+                    response.raise_for_status()
+                results[path] = sorted(runs)[len(runs) // 2]
+        return results
+
+    print(json.dumps(asyncio.run(drive())))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    print(f"{args.requests} sequential requests per run, median of {args.runs} runs")
+    results = {}
+    for label, enabled in (("metrics off", False), ("metrics on", True)):
+        db_path = os.path.join(tempfile.mkdtemp(prefix="slms-bench-"), "bench.db")
+        env = dict(
+            os.environ, DATABASE_URL=f"sqlite:///{db_path}", METRICS_ENABLED=str(enabled),
+            SLOW_QUERY_MS="200" if enabled else "0", N_PLUS_ONE_THRESHOLD="10" if enabled else "0",
+            ROLL_CALL_SCHEDULER_ENABLED="False"
+        )
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker",
+             "--requests", str(args.requests), "--runs", str(args.runs)],
+            env=env, capture_output=True, text=True, check=True
+        )
+        results[label] = json.loads(result.stdout.strip().splitlines()[-1])
+    for path in PATHS:
+        off, on = results["metrics off"][path], results["metrics on"][path]
+        print(f"{path:<20} off {off * 1e6:8.1f} us  on {on * 1e6:8.1f} us  overhead {(on - off) * 1e6:+7.1f} us")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Roll-call population benchmark for Student Life Management System
+Fills a roll call for every active student on a fresh SQLite database, once
+with the set-based populate_roll_call_entries (a single INSERT ... SELECT)
+and once with a per-student Python loop that queries each student's leave
+and adds the entry through the ORM, and reports the time for each.
+
+A share of the students are on approved leave at the scheduled time and a
+share are already at the roll call's location, so every status branch runs.
+
+Usage:
+    python benchmarks/populate_roll_call.py [--students 5000] [--runs 5]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="slms-bench-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, BACKEND_DIR)
+
+from datetime import datetime, timedelta
+from sqlalchemy import delete, select
+from main import (
+    engine, AsyncSessionLocal, User, Location, LeaveRequest, RollCall, RollCallEntry,
+    populate_roll_call_entries
+)
+
+SCHEDULED_TIME = datetime(2025, 3, 3, 9, 0)
+
+def seed(num_students: int):
+    with engine.begin() as conn:
+        conn.execute(Location.__table__.insert(), [
+            {"id": 1, "name": "Main Hall", "building": "A", "is_active": True},
+            {"id": 2, "name": "Library", "building": "B", "is_active": True},
+        ])
+        conn.execute(User.__table__.insert(), [{
+            "id": 1,
+            "email": "instructor@school.edu",
+            "username": "instructor",
+            "full_name": "Bench Instructor",
+            "hashed_password": "x",
+            "role": "instructor",
+            "is_active": True,
+        }])
+        conn.execute(User.__table__.insert(), [
+            {
+                "id": i + 2,
+                "email": f"student{i}@school.edu",
+                "username": f"student{i}",
+                "full_name": f"Student {i}",
+                "hashed_password": "x",
+                "role": "student",
+                "is_active": i % 50 != 0,
+                "current_location_id": 1 if i % 3 == 0 else 2,
+            }
+            for i in range(num_students)
+        ])
+        # One in ten students on approved leave over the roll call, plus
+        # pending and past leave that must not excuse anyone.
+        leaves = []
+        for i in range(num_students):
+            if i % 10 == 0:
+                leaves.append((i + 2, "approved", SCHEDULED_TIME - timedelta(days=1), SCHEDULED_TIME + timedelta(days=1)))
+            if i % 7 == 0:
+                leaves.append((i + 2, "pending", SCHEDULED_TIME - timedelta(hours=1), SCHEDULED_TIME + timedelta(hours=1)))
+            if i % 5 == 0:
+                leaves.append((i + 2, "approved", SCHEDULED_TIME - timedelta(days=9), SCHEDULED_TIME - timedelta(days=8)))
+        conn.execute(LeaveRequest.__table__.insert(), [
+            {"student_id": student_id, "reason": "bench", "status": status, "start_date": start, "end_date": end}
+            for student_id, status, start, end in leaves
+        ])
+        conn.execute(RollCall.__table__.insert(), [{
+            "id": 1,
+            "name": "Assembly",
+            "location_id": 1,
+            "conducted_by": 1,
+            "scheduled_time": SCHEDULED_TIME,
+            "is_active": True,
+        }])
+
+async def populate_set_based(db) -> int:
+    created = await populate_roll_call_entries(db, 1)
+    await db.commit()
+    return created
+
+async def populate_loop(db) -> int:
+    """Baseline: one leave lookup and one ORM insert per student."""
+    roll_call = await db.get(RollCall, 1)
+    students = (await db.scalars(
+        select(User).filter(User.role == "student", User.is_active == True)
+    )).all()
+    for student in students:
+        on_leave = (await db.scalars(
+            select(LeaveRequest.id).filter(
+                LeaveRequest.student_id == student.id,
+                LeaveRequest.status == "approved",
+                LeaveRequest.start_date <= roll_call.scheduled_time,
+                LeaveRequest.end_date > roll_call.scheduled_time
+            ).limit(1)
+        )).first()
+        if on_leave is not None:
+            entry_status = "excused"
+        elif student.current_location_id == roll_call.location_id:
+            entry_status = "present"
+        else:
+            entry_status = "absent"
+        db.add(RollCallEntry(roll_call_id=roll_call.id, student_id=student.id, status=entry_status))
+    await db.commit()
+    return len(students)
+
+async def run(runs: int):
+    results = {}
+    snapshots = {}
+    for label, populate in (("INSERT ... SELECT", populate_set_based), ("python loop", populate_loop)):
+        timings = []
+        for _ in range(runs):
+            async with AsyncSessionLocal() as db:
+                await db.execute(delete(RollCallEntry))
+                await db.commit()
+                start = time.perf_counter()
+                created = await populate(db)
+                timings.append(time.perf_counter() - start)
+                snapshots[label] = sorted((await db.execute(
+                    select(RollCallEntry.student_id, RollCallEntry.status)
+                )).all())
+        timings.sort()
+        results[label] = (created, timings[len(timings) // 2], timings[-1])
+    if len(set(map(tuple, snapshots.values()))) != 1:
+        raise SystemExit("populate strategies produced different entries")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    seed(args.students)
+    print(f"Populating one roll call for {args.students} students")
+    for label, (created, p50, worst) in asyncio.run(run(args.runs)).items():
+        print(f"{label:<18} {created:6d} entries  p50 {p50 * 1000:8.2f} ms  max {worst * 1000:8.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+SQLite concurrency benchmark for Student Life Management System
+Runs the same mixed read/write workload against the default SQLite settings
+and against SQLITE_PERFORMANCE_PROFILE=true, each in a fresh process and
+database, and reports throughput, latency and "database is locked" errors.
+
+Usage:
+    python benchmarks/sqlite_concurrency.py [--writers 8] [--readers 8] [--ops 200]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_worker(args):
+    sys.path.insert(0, BACKEND_DIR)
+    from datetime import datetime, timedelta
+    from sqlalchemy.exc import OperationalError
+    from main import SessionLocal, User, LeaveRequest, DatabaseBusy, func
+
+    db = SessionLocal()
+    db.add_all([
+        User(
+            email=f"bench{i}@school.edu",
+            username=f"bench{i}",
+            full_name=f"Bench {i}",
+            hashed_password="x",
+            role="student"
+        )
+        for i in range(args.writers * 10)
+    ])
+    db.commit()
+    student_ids = [row[0] for row in db.query(User.id).all()]
+    db.close()
+
+    latencies = []
+    errors = {"locked": 0}
+    reads = [0]
+    lock = threading.Lock()
+
+    def writer(n):
+        for i in range(args.ops):
+            start = time.perf_counter()
+            db = SessionLocal()
+            try:
+                student_id = student_ids[(n * args.ops + i) % len(student_ids)]
+                student = db.query(User).filter(User.id == student_id).first()
+                student.current_location_id = i % 5 + 1
+                db.add(LeaveRequest(
+                    student_id=student_id,
+                    reason="bench",
+                    start_date=datetime.utcnow(),
+                    end_date=datetime.utcnow() + timedelta(hours=1)
+                ))
+                db.commit()
+                with lock:
+                    latencies.append(time.perf_counter() - start)
+            except (OperationalError, DatabaseBusy):
+                db.rollback()
+                with lock:
+                    errors["locked"] += 1
+            finally:
+                db.close()
+
+    def reader():
+        while not done.is_set():
+            db = SessionLocal()
+            try:
+                db.query(func.count(LeaveRequest.id)).filter(LeaveRequest.status == "pending").scalar()
+                with lock:
+                    reads[0] += 1
+            except OperationalError:
+                with lock:
+                    errors["locked"] += 1
+            finally:
+                db.close()
+
+    done = threading.Event()
+    readers = [threading.Thread(target=reader) for _ in range(args.readers)]
+    writers = [threading.Thread(target=writer, args=(n,)) for n in range(args.writers)]
+    start = time.perf_counter()
+    for t in readers + writers:
+        t.start()
+    for t in writers:
+        t.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    for t in readers:
+        t.join()
+
+    latencies.sort()
+    print(json.dumps({
+        "elapsed": elapsed,
+        "commits": len(latencies),
+        "reads": reads[0],
+        "errors": errors["locked"],
+        "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else None,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else None,
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=200)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    print(f"{args.writers} writers x {args.ops} transactions, {args.readers} concurrent readers")
+    for label, profile in (("default", "False"), ("performance profile", "True")):
+        db_path = os.path.join(tempfile.mkdtemp(prefix="slms-bench-"), "bench.db")
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", SQLITE_PERFORMANCE_PROFILE=profile)
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker",
+             "--writers", str(args.writers), "--readers", str(args.readers), "--ops", str(args.ops)],
+            env=env, capture_output=True, text=True, check=True
+        )
+        stats = json.loads(result.stdout.strip().splitlines()[-1])
+        throughput = stats["commits"] / stats["elapsed"]
+        read_throughput = stats["reads"] / stats["elapsed"]
+        print(
+            f"{label:<20} {throughput:8.1f} commits/s  {read_throughput:8.1f} reads/s  "
+            f"p50 {stats['p50_ms'] or 0:7.2f} ms  p99 {stats['p99_ms'] or 0:8.2f} ms  "
+            f"locked errors {stats['errors']}"
+        )
+
+if __name__ == "__main__":
+    main()
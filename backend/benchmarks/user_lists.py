@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+User list benchmark for Student Life Management System
+Seeds --students students on a fresh SQLite database and loads pages of
+them the way /instructor/students used to (full User entities) and the way
+it does now (USER_RESPONSE_COLUMNS), validating each page into
+UserResponse like the route does. Reports statements, time and peak
+Python memory per page.
+
+Usage:
+    python benchmarks/user_lists.py [--students 20000] [--page-sizes 100,1000,10000] [--runs 5]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="slms-bench-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["SLOW_QUERY_MS"] = "0"
+sys.path.insert(0, BACKEND_DIR)
+
+from sqlalchemy import event, select
+from main import (
+    AsyncSessionLocal, USER_RESPONSE_COLUMNS, User, UserResponse, async_engine, engine
+)
+
+def seed(num_students: int):
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {
+                "email": f"student{i}@school.edu",
+                "username": f"student{i}",
+                "full_name": f"Student {i}",
+                # A real bcrypt hash is 60 characters
+                "hashed_password": "$2b$12$" + "x" * 53,
+                "role": "student",
+                "is_active": True,
+                "grade": "10",
+                "student_id": f"S{i:06d}",
+            }
+            for i in range(num_students)
+        ])
+
+async def load_entities(db, limit: int):
+    rows = (await db.scalars(select(User).filter(User.role == "student").order_by(User.id).limit(limit))).all()
+    return [UserResponse.model_validate(row) for row in rows]
+
+async def load_projection(db, limit: int):
+    rows = (await db.execute(
+        select(*USER_RESPONSE_COLUMNS).filter(User.role == "student").order_by(User.id).limit(limit)
+    )).all()
+    return [UserResponse.model_validate(row) for row in rows]
+
+async def measure(loader, limit: int, runs: int):
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    timings = []
+    try:
+        for _ in range(runs):
+            statements.clear()
+            async with AsyncSessionLocal() as db:
+                start = time.perf_counter()
+                page = await loader(db, limit)
+                timings.append(time.perf_counter() - start)
+            assert len(page) == limit
+        statements_per_page = len(statements)
+        # tracemalloc slows allocation down, so memory gets a run of its own
+        async with AsyncSessionLocal() as db:
+            tracemalloc.start()
+            page = await loader(db, limit)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+    timings.sort()
+    return statements_per_page, timings[len(timings) // 2], peak
+
+async def run(page_sizes, runs: int):
+    results = []
+    for limit in page_sizes:
+        for label, loader in (("entities", load_entities), ("projection", load_projection)):
+            await measure(loader, limit, 1)
+            results.append((limit, label) + await measure(loader, limit, runs))
+    await async_engine.dispose()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--page-sizes", default="100,1000,10000")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    page_sizes = [int(size) for size in args.page_sizes.split(",")]
+    seed(max(args.students, max(page_sizes)))
+    print(f"{max(args.students, max(page_sizes))} students, median of {args.runs} runs")
+    for limit, label, statements, elapsed, peak in asyncio.run(run(page_sizes, args.runs)):
+        print(
+            f"page {limit:6d}  {label:<10}  {statements} statement(s)  "
+            f"{elapsed * 1000:8.2f} ms  peak {peak / 1024:9.1f} KiB"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Chat broker for Student Life Management System
+Relays group chat messages between uvicorn workers so a message posted on one
+worker reaches sockets connected to every other worker.
+
+Workers connect when CHAT_BROKER_URL is set and exchange newline-delimited
+JSON frames: {"op": "sub"|"unsub", "topic": ...} and
+{"op": "pub", "topic": ..., "data": ...}. Each pub is forwarded verbatim to
+every connection subscribed to the topic, the publisher included.
+
+Usage:
+    python chat_broker.py [--host 127.0.0.1] [--port 7400]
+    CHAT_BROKER_URL=tcp://127.0.0.1:7400 uvicorn main:app --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger("chat_broker")
+
+subscribers = {}
+
+async def handle_worker(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    topics = set()
+    try:
+        while line := await reader.readline():
+            frame = json.loads(line)
+            op, topic = frame["op"], frame["topic"]
+            if op == "sub":
+                subscribers.setdefault(topic, set()).add(writer)
+                topics.add(topic)
+            elif op == "unsub":
+                subscribers.get(topic, set()).discard(writer)
+                topics.discard(topic)
+            elif op == "pub":
+                for subscriber in subscribers.get(topic, ()):
+                    subscriber.write(line)
+    except (ConnectionError, ValueError, KeyError):
+        logger.exception("Dropping worker connection")
+    finally:
+        for topic in topics:
+            topic_subscribers = subscribers.get(topic)
+            if topic_subscribers is not None:
+                topic_subscribers.discard(writer)
+                if not topic_subscribers:
+                    del subscribers[topic]
+        writer.close()
+
+async def serve(host: str, port: int):
+    server = await asyncio.start_server(handle_worker, host, port, limit=1024 * 1024)
+    logger.info("Chat broker listening on %s:%s", host, port)
+    async with server:
+        await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7400)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(args.host, args.port))
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,212 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.routing import APIRoute
 from fastapi.security import HTTPBearer, OAuth2PasswordRequestForm
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, ForeignKey, Text
+from sqlalchemy import create_engine, event, Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Index, case, cast, delete, insert, literal, or_, select, update
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session, relationship
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.util import await_only
 from sqlalchemy.sql import func
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List
-from datetime import datetime, timedelta
+from pydantic import BaseModel, EmailStr, Field, ValidationError
+from typing import Dict, List, Literal, Optional, Tuple
+from datetime import date, datetime, timedelta, timezone
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from bisect import bisect_left
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+import asyncio
+import base64
+import binascii
+import contextvars
+import hashlib
+import hmac
+import heapq
+import json
+import logging
+import orjson
+import socket
+import threading
+import time
 import os
+import uuid
+from starlette.exceptions import HTTPException as StarletteHTTPException
 from dotenv import load_dotenv
+import analytics
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Database setup
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./student_life.db")
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {})
+
+# Connection pool (ignored for SQLite)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait and how often they time out."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            wait = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+
+    def stats(self) -> dict:
+        return {
+            "pool_size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": self.total_wait / self.checkouts * 1000 if self.checkouts else 0.0,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+if "sqlite" in DATABASE_URL:
+    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+else:
+    engine = create_engine(
+        DATABASE_URL,
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING
+    )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Async engine used by the route handlers (aiosqlite locally, asyncpg in production)
+def _async_database_url(url: str) -> str:
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    if url.startswith("postgresql:") or url.startswith("postgres:"):
+        return "postgresql+asyncpg:" + url.split(":", 1)[1]
+    return url
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_database_url(DATABASE_URL))
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    pass
+
+class AsyncBackedSession(Session):
+    """Sync session class proxied by AsyncSession, so events can tell the two apart."""
+
+if "sqlite" in ASYNC_DATABASE_URL:
+    async_engine = create_async_engine(ASYNC_DATABASE_URL)
+else:
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING
+    )
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    sync_session_class=AsyncBackedSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+# SQLite performance profile (opt-in): WAL, relaxed fsync and one writer per process
+SQLITE_PERFORMANCE_PROFILE = os.getenv("SQLITE_PERFORMANCE_PROFILE", "False").lower() == "true"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+class DatabaseBusy(Exception):
+    pass
+
+sqlite_write_lock = threading.Lock()
+sqlite_async_write_lock = asyncio.Lock()
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+def _acquire_write_lock(session):
+    # pysqlite only opens a transaction at the first DML statement, so taking
+    # the lock here serializes writers without holding it across plain reads.
+    # Async sessions wait on an asyncio lock so the event loop is never blocked.
+    if "sqlite_write_lock" in session.info:
+        return
+    timeout = SQLITE_BUSY_TIMEOUT_MS / 1000
+    if isinstance(session, AsyncBackedSession):
+        try:
+            await_only(asyncio.wait_for(sqlite_async_write_lock.acquire(), timeout))
+        except asyncio.TimeoutError:
+            raise DatabaseBusy()
+        session.info["sqlite_write_lock"] = sqlite_async_write_lock
+    else:
+        if not sqlite_write_lock.acquire(timeout=timeout):
+            raise DatabaseBusy()
+        session.info["sqlite_write_lock"] = sqlite_write_lock
+
+def _release_write_lock(session, transaction):
+    if transaction.parent is None:
+        lock = session.info.pop("sqlite_write_lock", None)
+        if lock is not None:
+            lock.release()
+
+def _acquire_write_lock_for_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _acquire_write_lock(orm_execute_state.session)
+
+if SQLITE_PERFORMANCE_PROFILE and DATABASE_URL.startswith("sqlite"):
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    for session_target in (SessionLocal, AsyncBackedSession):
+        event.listen(session_target, "before_flush", lambda session, flush_context, instances: _acquire_write_lock(session))
+        event.listen(session_target, "do_orm_execute", _acquire_write_lock_for_dml)
+        event.listen(session_target, "after_transaction_end", _release_write_lock)
+
 # Security setup
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production")
 ALGORITHM = "HS256"
@@ -29,11 +214,117 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+# Password hashing pool (bcrypt is CPU bound and must not occupy request threads)
+HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", "4"))
+HASH_POOL_MAX_QUEUE = int(os.getenv("HASH_POOL_MAX_QUEUE", "32"))
+
+# Authenticated principal cache: user changes are published to every worker;
+# the TTL bounds staleness if such a message is lost while the broker is down
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "10000"))
+
+# Dashboard stats cache
+STATS_CACHE_TTL_SECONDS = float(os.getenv("STATS_CACHE_TTL_SECONDS", "5"))
+
+# Live roll calls: persist marks every N ms or once M changes are pending
+LIVE_ROLL_CALL_FLUSH_INTERVAL_MS = int(os.getenv("LIVE_ROLL_CALL_FLUSH_INTERVAL_MS", "500"))
+LIVE_ROLL_CALL_FLUSH_MAX_CHANGES = int(os.getenv("LIVE_ROLL_CALL_FLUSH_MAX_CHANGES", "50"))
+
+# Pub/sub for group chat and presence: in-process unless CHAT_BROKER_URL
+# (tcp://host:port of chat_broker.py) is set, in which case every worker
+# shares the broker
+CHAT_BROKER_URL = os.getenv("CHAT_BROKER_URL", "")
+CHAT_SUBSCRIBER_QUEUE_SIZE = int(os.getenv("CHAT_SUBSCRIBER_QUEUE_SIZE", "256"))
+
+# Approved leave index: reloaded from the database this often, so a change
+# whose pub/sub frame was lost while the broker was down is picked up (0 = never)
+LEAVE_INDEX_RELOAD_SECONDS = float(os.getenv("LEAVE_INDEX_RELOAD_SECONDS", "60"))
+
+# Live presence: rebuilt from users.current_location_id this often, so a move
+# whose pub/sub frame was lost while the broker was down is picked up (0 = never)
+PRESENCE_RELOAD_SECONDS = float(os.getenv("PRESENCE_RELOAD_SECONDS", "60"))
+
+# Gate scanner check-ins
+LOCATION_CHECK_IN_MAX_BATCH = int(os.getenv("LOCATION_CHECK_IN_MAX_BATCH", "2000"))
+LOCATION_IDS_CACHE_TTL_SECONDS = float(os.getenv("LOCATION_IDS_CACHE_TTL_SECONDS", "60"))
+
+# Location history: raw events older than the retention window are rolled up
+# into per-hour summaries every LOCATION_HISTORY_COMPACT_INTERVAL_SECONDS (0 = never)
+LOCATION_HISTORY_RETENTION_DAYS = int(os.getenv("LOCATION_HISTORY_RETENTION_DAYS", "30"))
+LOCATION_HISTORY_COMPACT_INTERVAL_SECONDS = int(os.getenv("LOCATION_HISTORY_COMPACT_INTERVAL_SECONDS", "3600"))
+
+# Occupancy SSE feed: comment line sent when idle so proxies keep it open
+OCCUPANCY_STREAM_KEEPALIVE_SECONDS = float(os.getenv("OCCUPANCY_STREAM_KEEPALIVE_SECONDS", "15"))
+
+# Location list responses: encoded bodies and ETags for /admin/locations and
+# /common/locations, dropped on every location write (in every worker, via
+# pub/sub) and otherwise kept for LOCATION_RESPONSE_CACHE_TTL_SECONDS
+LOCATION_RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("LOCATION_RESPONSE_CACHE_TTL_SECONDS", "300"))
+LOCATION_RESPONSE_CACHE_MAX_SIZE = int(os.getenv("LOCATION_RESPONSE_CACHE_MAX_SIZE", "256"))
+
+# Roll-call scheduler: the worker holding the database lease activates roll
+# calls at their scheduled_time. Calls due within two reload intervals are
+# kept in memory; the lease is renewed every ROLL_CALL_LEASE_SECONDS / 3
+ROLL_CALL_SCHEDULER_ENABLED = os.getenv("ROLL_CALL_SCHEDULER_ENABLED", "True").lower() == "true"
+ROLL_CALL_LEASE_SECONDS = float(os.getenv("ROLL_CALL_LEASE_SECONDS", "30"))
+ROLL_CALL_SCHEDULER_RELOAD_SECONDS = float(os.getenv("ROLL_CALL_SCHEDULER_RELOAD_SECONDS", "300"))
+# Roll calls whose scheduled_time passed longer ago than this (e.g. while no
+# worker held the lease, or before activated_at existed) are never auto-activated
+ROLL_CALL_SCHEDULER_GRACE_SECONDS = float(os.getenv("ROLL_CALL_SCHEDULER_GRACE_SECONDS", "900"))
+
+# Attendance reports: default window when no start is given, and the share of
+# non-excused roll calls missed that flags a student as chronically absent
+ATTENDANCE_REPORT_DEFAULT_DAYS = int(os.getenv("ATTENDANCE_REPORT_DEFAULT_DAYS", "120"))
+ATTENDANCE_CHRONIC_ABSENCE_RATE = float(os.getenv("ATTENDANCE_CHRONIC_ABSENCE_RATE", "0.1"))
+
+# Metrics: per-route request counts, latency and DB query histograms served
+# from /metrics in the Prometheus text format, per worker process. With
+# METRICS_TOKEN set, scrapes must send "Authorization: Bearer <token>"
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# SQL instrumentation: statements slower than SLOW_QUERY_MS are logged with the
+# types of their bound parameters (never the values), and a statement run more
+# than N_PLUS_ONE_THRESHOLD times in one request is logged as a likely N+1, or
+# raises NPlusOneQueries with N_PLUS_ONE_RAISE=true (for tests). 0 turns either off
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+N_PLUS_ONE_RAISE = os.getenv("N_PLUS_ONE_RAISE", "False").lower() == "true"
+
+# Fast list responses (opt-in): list routes encode their projected rows with
+# orjson straight to bytes instead of validating every row into its response
+# model first. The declared response_model, and so the OpenAPI schema, is unchanged
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "False").lower() == "true"
+
 # FastAPI app
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await pubsub_hub.start()
+    await principal_cache.start()
+    await presence.start()
+    await leave_index.start()
+    await roll_call_scheduler.start()
+    await live_roll_calls.start()
+    await location_responses.start()
+    compactor = asyncio.create_task(compact_location_history_periodically())
+    yield
+    compactor.cancel()
+    await location_responses.stop()
+    await live_roll_calls.stop()
+    await roll_call_scheduler.stop()
+    await leave_index.stop()
+    await presence.stop()
+    await principal_cache.stop()
+    await pubsub_hub.stop()
+    await live_roll_calls.flush_all()
+    hashing_pool.shutdown()
+    await async_engine.dispose()
+
 app = FastAPI(
     title="Student Life Management System",
     description="A comprehensive system for managing student life activities",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -43,11 +334,222 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Metrics
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+class Histogram:
+    """One Prometheus histogram series; buckets are made cumulative on render."""
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+class RequestMetrics:
+    """What one request did, filled in by dependencies and the engine hooks."""
+    __slots__ = ("route", "role", "queries", "query_seconds", "statements")
+
+    def __init__(self, route: str):
+        self.route = route
+        self.role = "anonymous"
+        self.queries = 0
+        self.query_seconds = 0.0
+        # Executions per statement text, for the N+1 check
+        self.statements = defaultdict(int)
+
+current_request_metrics = contextvars.ContextVar("current_request_metrics", default=None)
+
+def _label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names: Tuple[str, ...], values: tuple) -> str:
+    return ",".join(f'{name}="{_label_value(value)}"' for name, value in zip(names, values))
+
+class MetricsRegistry:
+    """Request metrics for this worker process.
+
+    Everything is recorded on the event loop thread, so plain dict and
+    integer updates are enough; no locks on the hot path.
+    """
+
+    def __init__(self):
+        self.requests = defaultdict(int)
+        self.in_progress = defaultdict(int)
+        self.latency = {}
+        self.queries = {}
+        self.query_time = {}
+
+    def record(self, method: str, route: str, request_metrics: RequestMetrics, status_code: int, elapsed: float):
+        key = (method, route, request_metrics.role)
+        self.requests[key + (status_code,)] += 1
+        latency = self.latency.get(key)
+        if latency is None:
+            latency = self.latency[key] = Histogram(LATENCY_BUCKETS)
+            self.queries[key] = Histogram(QUERY_COUNT_BUCKETS)
+            self.query_time[key] = Histogram(LATENCY_BUCKETS)
+        latency.observe(elapsed)
+        self.queries[key].observe(request_metrics.queries)
+        self.query_time[key].observe(request_metrics.query_seconds)
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_requests_total Requests handled, by route template, role and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        for key, count in self.requests.items():
+            lines.append(f"http_requests_total{{{_labels(('method', 'route', 'role', 'status'), key)}}} {count}")
+        lines += [
+            "# HELP http_requests_in_progress Requests being handled right now.",
+            "# TYPE http_requests_in_progress gauge",
+        ]
+        for key, count in self.in_progress.items():
+            lines.append(f"http_requests_in_progress{{{_labels(('method', 'route'), key)}}} {count}")
+        for name, help_text, series in (
+            ("http_request_duration_seconds", "Time to produce a response.", self.latency),
+            ("http_request_db_queries", "Database statements executed per request.", self.queries),
+            ("http_request_db_seconds", "Time spent executing database statements per request.", self.query_time),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for key, histogram in list(series.items()):
+                labels = _labels(("method", "route", "role"), key)
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(float(bound))
+                    lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+class MetricsRoute(APIRoute):
+    """APIRoute that records every request against its path template.
+
+    The template is known when the route is built, so nothing is matched or
+    parsed per request; the role is filled in by get_current_user.
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        route = self.path_format
+
+        async def metered_handler(request: Request) -> Response:
+            request_metrics = RequestMetrics(route)
+            token = current_request_metrics.set(request_metrics)
+            method = request.method
+            metrics.in_progress[(method, route)] += 1
+            start = time.perf_counter()
+            status_code = 500
+            try:
+                response = await handler(request)
+                status_code = response.status_code
+                return response
+            except StarletteHTTPException as exc:
+                status_code = exc.status_code
+                raise
+            except RequestValidationError:
+                status_code = 422
+                raise
+            except (DatabaseBusy, PoolTimeoutError, HashingPoolOverloaded):
+                # Load shedding: the exception handlers answer these with 503 + Retry-After
+                status_code = 503
+                raise
+            finally:
+                metrics.in_progress[(method, route)] -= 1
+                metrics.record(method, route, request_metrics, status_code, time.perf_counter() - start)
+                current_request_metrics.reset(token)
+
+        return metered_handler
+
+class NPlusOneQueries(Exception):
+    pass
+
+def _value_shape(value) -> str:
+    if value is None:
+        return "None"
+    if isinstance(value, (str, bytes)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+def parameter_shape(parameters, executemany: bool = False) -> str:
+    """Types of bound parameters, never their values: "(int, str[12], int*500)"."""
+    # Batched INSERT ... RETURNING runs flagged executemany with one flat row
+    if executemany and parameters and isinstance(parameters[0], (tuple, list, dict)):
+        return f"{len(parameters)} x {parameter_shape(parameters[0])}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{name}: {_value_shape(value)}" for name, value in parameters.items()) + "}"
+    # Runs of one shape, e.g. an expanded IN list, are folded into "type*count"
+    runs = []
+    for value in parameters or ():
+        shape = _value_shape(value)
+        if runs and runs[-1][0] == shape:
+            runs[-1][1] += 1
+        else:
+            runs.append([shape, 1])
+    return "(" + ", ".join(shape if count == 1 else f"{shape}*{count}" for shape, count in runs) + ")"
+
+def _statement_text(statement: str, limit: int = 500) -> str:
+    text = " ".join(statement.split())
+    return text if len(text) <= limit else text[:limit] + "..."
+
+def before_query(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+    request_metrics = current_request_metrics.get()
+    if request_metrics is None:
+        return
+    request_metrics.queries += 1
+    if N_PLUS_ONE_THRESHOLD:
+        runs = request_metrics.statements[statement] + 1
+        request_metrics.statements[statement] = runs
+        # Reported once, when the statement first crosses the threshold
+        if runs == N_PLUS_ONE_THRESHOLD + 1:
+            message = (
+                f"Possible N+1 in {request_metrics.route}: statement ran more than "
+                f"{N_PLUS_ONE_THRESHOLD} times in one request: {_statement_text(statement)}"
+            )
+            if N_PLUS_ONE_RAISE:
+                raise NPlusOneQueries(message)
+            logger.warning(message)
+
+def after_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    request_metrics = current_request_metrics.get()
+    if request_metrics is not None:
+        request_metrics.query_seconds += elapsed
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        logger.warning(
+            "Slow query (%.1f ms)%s: %s parameters %s",
+            elapsed * 1000,
+            f" in {request_metrics.route}" if request_metrics is not None else "",
+            _statement_text(statement),
+            parameter_shape(parameters, executemany),
+        )
+
+if METRICS_ENABLED or N_PLUS_ONE_THRESHOLD:
+    # Routes declared below are built with MetricsRoute, which also carries the
+    # per-request statement counts the N+1 check reads
+    app.router.route_class = MetricsRoute
+if METRICS_ENABLED or N_PLUS_ONE_THRESHOLD or SLOW_QUERY_MS:
+    for query_target in (engine, async_engine.sync_engine):
+        event.listen(query_target, "before_cursor_execute", before_query)
+        event.listen(query_target, "after_cursor_execute", after_query)
+
 # Database Models
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_role", "role"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
@@ -60,10 +562,14 @@ class User(Base):
     student_id = Column(String, unique=True, nullable=True)  # For students
     department = Column(String, nullable=True)  # For instructors
     current_location_id = Column(Integer, ForeignKey("locations.id"), nullable=True)
+    location_updated_at = Column(DateTime, nullable=True)  # UTC time of the last move or gate scan
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 class Location(Base):
     __tablename__ = "locations"
+    __table_args__ = (
+        Index("ix_locations_is_active", "is_active"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, unique=True)
@@ -74,6 +580,11 @@ class Location(Base):
 
 class LeaveRequest(Base):
     __tablename__ = "leave_requests"
+    __table_args__ = (
+        Index("ix_leave_requests_student_id_status", "student_id", "status"),
+        Index("ix_leave_requests_student_id_start_date_end_date", "student_id", "start_date", "end_date"),
+        Index("ix_leave_requests_status_id", "status", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -82,22 +593,32 @@ class LeaveRequest(Base):
     end_date = Column(DateTime, nullable=False)
     status = Column(String, default="pending")  # pending, approved, rejected
     approved_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    approved_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 class RollCall(Base):
     __tablename__ = "roll_calls"
+    __table_args__ = (
+        Index("ix_roll_calls_conducted_by", "conducted_by"),
+        Index("ix_roll_calls_activated_at_scheduled_time", "activated_at", "scheduled_time"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     location_id = Column(Integer, ForeignKey("locations.id"), nullable=True)
     conducted_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     scheduled_time = Column(DateTime, nullable=False)
+    activated_at = Column(DateTime, nullable=True)
     conducted_at = Column(DateTime(timezone=True), nullable=True)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 class RollCallEntry(Base):
     __tablename__ = "roll_call_entries"
+    __table_args__ = (
+        Index("ix_roll_call_entries_roll_call_id_student_id", "roll_call_id", "student_id", unique=True),
+        Index("ix_roll_call_entries_student_id", "student_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     roll_call_id = Column(Integer, ForeignKey("roll_calls.id"), nullable=False)
@@ -107,6 +628,96 @@ class RollCallEntry(Base):
     marked_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     marked_at = Column(DateTime(timezone=True), server_default=func.now())
 
+class GroupChat(Base):
+    __tablename__ = "group_chats"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    description = Column(Text, nullable=True)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+class GroupChatMember(Base):
+    __tablename__ = "group_chat_members"
+    __table_args__ = (
+        Index("ix_group_chat_members_group_chat_id_user_id", "group_chat_id", "user_id", unique=True),
+        Index("ix_group_chat_members_user_id", "user_id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    group_chat_id = Column(Integer, ForeignKey("group_chats.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    role = Column(String, default="member")  # admin, member
+    joined_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class GroupChatMessage(Base):
+    """Append-only: messages are never updated or deleted."""
+    __tablename__ = "group_chat_messages"
+    __table_args__ = (
+        Index("ix_group_chat_messages_group_chat_id_id", "group_chat_id", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    group_chat_id = Column(Integer, ForeignKey("group_chats.id"), nullable=False)
+    sender_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    body = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class LocationEvent(Base):
+    """Append-only move log: integer ids and epoch seconds only.
+
+    No foreign keys, so the history outlives deleted users and locations.
+    """
+    __tablename__ = "location_events"
+    __table_args__ = (
+        Index("ix_location_events_student_id_ts", "student_id", "ts"),
+        Index("ix_location_events_location_id_ts", "location_id", "ts"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    student_id = Column(Integer, nullable=False)
+    location_id = Column(Integer, nullable=False)
+    ts = Column(Integer, nullable=False)
+
+class LocationHourly(Base):
+    """Compacted location events: one row per student, location and hour."""
+    __tablename__ = "location_hourly"
+    __table_args__ = (
+        Index("ix_location_hourly_location_id_hour_ts", "location_id", "hour_ts"),
+    )
+    
+    student_id = Column(Integer, primary_key=True)
+    hour_ts = Column(Integer, primary_key=True)
+    location_id = Column(Integer, primary_key=True)
+    events = Column(Integer, nullable=False)
+    first_ts = Column(Integer, nullable=False)
+    last_ts = Column(Integer, nullable=False)
+
+class AttendanceSummary(Base):
+    """Entry counts by status for one student, roll call or instructor.
+
+    Kept current by every roll_call_entries write; rebuild_attendance_summaries
+    recomputes them from scratch.
+    """
+    __tablename__ = "attendance_summaries"
+    
+    scope = Column(String, primary_key=True)
+    scope_id = Column(Integer, primary_key=True)
+    present = Column(Integer, nullable=False, default=0)
+    late = Column(Integer, nullable=False, default=0)
+    absent = Column(Integer, nullable=False, default=0)
+    excused = Column(Integer, nullable=False, default=0)
+
+class SchedulerLease(Base):
+    """Which worker runs a background job; a holder keeps it by renewing before expires_at."""
+    __tablename__ = "scheduler_leases"
+    
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
 # Create tables
 Base.metadata.create_all(bind=engine)
 
@@ -135,6 +746,19 @@ class UserResponse(UserBase):
     class Config:
         from_attributes = True
 
+# Exactly the columns UserResponse emits. Selecting these instead of User keeps
+# hashed_password and the identity map out of user lists
+USER_RESPONSE_COLUMNS = tuple(getattr(User, name) for name in UserResponse.model_fields)
+
+class UserUpdate(BaseModel):
+    email: Optional[EmailStr] = None
+    full_name: Optional[str] = None
+    role: Optional[str] = None
+    is_active: Optional[bool] = None
+    grade: Optional[str] = None
+    student_id: Optional[str] = None
+    department: Optional[str] = None
+
 class UserLogin(BaseModel):
     username: str
     password: str
@@ -157,6 +781,59 @@ class LocationResponse(LocationBase):
     class Config:
         from_attributes = True
 
+LOCATION_RESPONSE_COLUMNS = tuple(getattr(Location, name) for name in LocationResponse.model_fields)
+
+class LocationUpdate(BaseModel):
+    name: Optional[str] = None
+    description: Optional[str] = None
+    building: Optional[str] = None
+    is_active: Optional[bool] = None
+
+class LocationOccupancyResponse(LocationResponse):
+    occupancy: int
+
+class LocationCheckInBatch(BaseModel):
+    # (student_id, location_id, scanned_at) as sent by the gate scanners
+    check_ins: List[Tuple[int, int, datetime]] = Field(max_length=LOCATION_CHECK_IN_MAX_BATCH)
+
+class LocationCheckInResult(BaseModel):
+    received: int
+    applied: int
+    stale: int
+    unknown_student_ids: List[int]
+    unknown_location_ids: List[int]
+
+class LocationEventResponse(BaseModel):
+    student_id: int
+    location_id: int
+    ts: int
+
+    class Config:
+        from_attributes = True
+
+class LocationHourlyResponse(BaseModel):
+    student_id: int
+    location_id: int
+    hour_ts: int
+    events: int
+    first_ts: int
+    last_ts: int
+
+    class Config:
+        from_attributes = True
+
+class LocationHistoryResponse(BaseModel):
+    """Raw events inside the retention window plus hourly summaries for older hours (epoch seconds)."""
+    events: List[LocationEventResponse]
+    hourly: List[LocationHourlyResponse]
+
+class LocationAtResponse(BaseModel):
+    student_id: int
+    at: int
+    location_id: Optional[int] = None
+    since: Optional[int] = None
+    source: Optional[Literal["event", "hourly"]] = None
+
 class LeaveRequestBase(BaseModel):
     reason: str
     start_date: datetime
@@ -167,11 +844,259 @@ class LeaveRequestResponse(LeaveRequestBase):
     student_id: int
     status: str
     approved_by: Optional[int] = None
+    approved_at: Optional[datetime] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class LeaveRequestBatchDecision(BaseModel):
+    decisions: Dict[int, Literal["approved", "rejected"]]
+
+class LeaveRequestBatchDecisionResult(BaseModel):
+    approved: List[int]
+    rejected: List[int]
+    skipped: List[int]
+
+RollCallEntryStatus = Literal["present", "absent", "late", "excused"]
+
+class RollCallBase(BaseModel):
+    name: str
+    location_id: Optional[int] = None
+    scheduled_time: datetime
+
+class RollCallResponse(RollCallBase):
+    id: int
+    conducted_by: int
+    activated_at: Optional[datetime] = None
+    conducted_at: Optional[datetime] = None
+    is_active: bool
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class RollCallBulkMark(BaseModel):
+    entries: Dict[int, RollCallEntryStatus]
+
+class RollCallBulkMarkResult(BaseModel):
+    roll_call_id: int
+    marked: int
+    counts: Dict[str, int]
+    auto_excused: int = 0
+
+class RollCallPopulateResult(BaseModel):
+    roll_call_id: int
+    created: int
+    counts: Dict[str, int]
+
+class AttendanceCounts(BaseModel):
+    entries: int
+    present: int
+    late: int
+    absent: int
+    excused: int
+    attendance_rate: Optional[float] = None
+    absence_rate: Optional[float] = None
+
+class StudentAttendanceReport(AttendanceCounts):
+    student_id: int
+    longest_late_streak: int
+    current_late_streak: int
+    chronic_absence: bool
+
+class AttendanceTrendPoint(AttendanceCounts):
+    bucket_start: date
+    roll_calls: int
+
+class LocationAttendanceTrend(AttendanceTrendPoint):
+    location_id: Optional[int] = None
+
+class InstructorAttendanceTrend(AttendanceTrendPoint):
+    instructor_id: int
+
+class OnLeaveResponse(BaseModel):
+    at: datetime
+    student_ids: List[int]
+
+class GroupChatCreate(BaseModel):
+    name: str
+    description: Optional[str] = None
+    member_ids: List[int] = []
+
+class GroupChatResponse(BaseModel):
+    id: int
+    name: str
+    description: Optional[str] = None
+    created_by: int
+    is_active: bool
     created_at: datetime
 
     class Config:
         from_attributes = True
 
+class GroupChatMessageCreate(BaseModel):
+    body: str = Field(min_length=1, max_length=4000)
+
+class GroupChatMessageResponse(BaseModel):
+    id: int
+    group_chat_id: int
+    sender_id: int
+    body: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+# Caches
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a time-to-live."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self._on_evict(key, value)
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._on_evict(key, previous[1])
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._on_set(key, value)
+            while len(self._data) > self.maxsize:
+                old_key, (_, old_value) = self._data.popitem(last=False)
+                self._on_evict(old_key, old_value)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, None)
+            if item is None:
+                return default
+            self._on_evict(key, item[1])
+            return item[1]
+
+    def clear(self):
+        with self._lock:
+            for key, (_, value) in self._data.items():
+                self._on_evict(key, value)
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def _on_set(self, key, value):
+        pass
+
+    def _on_evict(self, key, value):
+        pass
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    role: str
+    is_active: bool
+    current_location_id: Optional[int] = None
+
+    @classmethod
+    def from_user(cls, user: "User") -> "Principal":
+        return cls(
+            id=user.id,
+            role=user.role,
+            is_active=user.is_active,
+            current_location_id=user.current_location_id
+        )
+
+PRINCIPAL_TOPIC = "principals"
+
+class PrincipalCache(TTLCache):
+    """Token -> Principal cache that can drop every token belonging to a user.
+
+    invalidate_users also publishes the ids on pubsub_hub so every worker
+    drops them; a frame lost while the broker is unreachable is bounded by
+    the TTL.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__(maxsize, ttl)
+        self._tokens_by_user = {}
+        self._queue = None
+        self._task = None
+
+    async def start(self):
+        self._queue = pubsub_hub.subscribe(PRINCIPAL_TOPIC, maxsize=0)
+        self._task = asyncio.create_task(self._follow())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            pubsub_hub.unsubscribe(PRINCIPAL_TOPIC, self._queue)
+
+    def _on_set(self, token, principal):
+        self._tokens_by_user.setdefault(principal.id, set()).add(token)
+
+    def _on_evict(self, token, principal):
+        tokens = self._tokens_by_user.get(principal.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[principal.id]
+
+    def invalidate_user(self, user_id: int):
+        """Drop the user's tokens in this worker only."""
+        with self._lock:
+            for token in self._tokens_by_user.pop(user_id, ()):
+                self._data.pop(token, None)
+
+    async def invalidate_users(self, user_ids):
+        """Drop the users' tokens here and in every other worker."""
+        user_ids = list(user_ids)
+        for user_id in user_ids:
+            self.invalidate_user(user_id)
+        try:
+            await pubsub_hub.publish(PRINCIPAL_TOPIC, json.dumps(user_ids))
+        except OSError:
+            logger.exception("Publishing principal invalidations failed")
+
+    async def _follow(self):
+        # Our own invalidations come back here too; dropping twice is harmless
+        while True:
+            for user_id in json.loads(await self._queue.get()):
+                self.invalidate_user(user_id)
+
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_MAX_SIZE, PRINCIPAL_CACHE_TTL_SECONDS)
+
+# Keyed by ("administrator",), ("instructor", user_id) or ("student", user_id)
+stats_cache = TTLCache(PRINCIPAL_CACHE_MAX_SIZE, STATS_CACHE_TTL_SECONDS)
+
+location_ids_cache = TTLCache(1, LOCATION_IDS_CACHE_TTL_SECONDS)
+
+async def get_active_location_ids(db: AsyncSession) -> frozenset:
+    location_ids = location_ids_cache.get("active")
+    if location_ids is None:
+        location_ids = frozenset((await db.scalars(select(Location.id).filter(Location.is_active == True))).all())
+        location_ids_cache.set("active", location_ids)
+    return location_ids
+
 # Database dependency
 def get_db():
     db = SessionLocal()
@@ -180,13 +1105,148 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def upsert(model, index_elements: List[str], update_values: dict):
+    """INSERT ... ON CONFLICT DO UPDATE for the dialect behind the async engine.
+
+    update_values maps column names to a column name of the proposed row
+    (taken from EXCLUDED), a SQL expression, or a function that receives
+    EXCLUDED and returns an expression.
+    """
+    insert = sqlite_insert if async_engine.dialect.name == "sqlite" else postgresql_insert
+    stmt = insert(model)
+    set_ = {}
+    for column, value in update_values.items():
+        if isinstance(value, str):
+            value = getattr(stmt.excluded, value)
+        elif callable(value):
+            value = value(stmt.excluded)
+        set_[column] = value
+    return stmt.on_conflict_do_update(index_elements=index_elements, set_=set_)
+
+def insert_or_ignore(model, index_elements: List[str]):
+    """INSERT ... ON CONFLICT DO NOTHING for the dialect behind the async engine."""
+    insert = sqlite_insert if async_engine.dialect.name == "sqlite" else postgresql_insert
+    return insert(model).on_conflict_do_nothing(index_elements=index_elements)
+
+# Pagination
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+async def paginate(
+    db: AsyncSession, stmt, model, response: Response, skip: int, limit: int, cursor: Optional[str],
+    descending: bool = False
+):
+    """Page by primary key; a cursor switches from OFFSET to a keyset seek.
+
+    When the page is full the cursor for the next page is returned in the
+    X-Next-Cursor header so the list response bodies stay unchanged.
+    descending=True walks newest first, e.g. for chat history. stmt may
+    select one entity or a column projection that includes its id.
+    """
+    if descending:
+        stmt = stmt.order_by(model.id.desc())
+    else:
+        stmt = stmt.order_by(model.id)
+    if cursor:
+        last_id = decode_cursor(cursor)
+        stmt = stmt.filter(model.id < last_id if descending else model.id > last_id)
+    else:
+        stmt = stmt.offset(skip)
+    
+    result = await db.execute(stmt.limit(limit))
+    rows = result.scalars().all() if len(result.keys()) == 1 else result.all()
+    if rows and len(rows) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].id)
+    return rows
+
+def list_response(items: list, response: Optional[Response] = None):
+    """Return a list route's items, pre-encoded when FAST_JSON_RESPONSES is on.
+
+    items are column projections (or dicts) whose keys are the route's
+    response_model fields. Returning a Response makes FastAPI skip
+    validating each item, so headers already set on `response` (e.g.
+    X-Next-Cursor) are carried over by hand.
+    """
+    if not FAST_JSON_RESPONSES:
+        return items
+    # OPT_UTC_Z writes aware UTC datetimes as "Z", as pydantic does
+    body = orjson.dumps(
+        [item if isinstance(item, dict) else item._asdict() for item in items], option=orjson.OPT_UTC_Z
+    )
+    return Response(body, media_type="application/json", headers=response.headers if response is not None else None)
+
 # Security functions
+class HashingPoolOverloaded(Exception):
+    pass
+
+class HashingPool:
+    """Bounded thread pool for bcrypt work with a capped wait queue."""
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return max(self._in_flight - self.max_workers, 0)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "rejected": self._rejected,
+        }
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise HashingPoolOverloaded()
+            self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+hashing_pool = HashingPool(HASH_POOL_WORKERS, HASH_POOL_MAX_QUEUE)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await hashing_pool.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await hashing_pool.run(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -205,11 +1265,21 @@ def verify_token(token: str) -> Optional[dict]:
     except JWTError:
         return None
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPBearer = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    token = credentials.credentials
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    principal = await authenticate_token(credentials.credentials, db)
+    request_metrics = current_request_metrics.get()
+    if request_metrics is not None:
+        request_metrics.role = principal.role
+    return principal
+
+async def authenticate_token(token: str, db: AsyncSession) -> Principal:
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+    
     payload = verify_token(token)
     
     if payload is None:
@@ -225,7 +1295,9 @@ def get_current_user(
             detail="Could not validate credentials"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = (await db.execute(
+        select(User.id, User.role, User.is_active, User.current_location_id).filter(User.id == user_id)
+    )).first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -238,9 +1310,11 @@ def get_current_user(
             detail="Inactive user"
         )
     
-    return user
+    principal = Principal.from_user(user)
+    principal_cache.set(token, principal, ttl=payload["exp"] - time.time())
+    return principal
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
+async def require_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
     if current_user.role != "administrator":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -248,7 +1322,7 @@ def require_admin(current_user: User = Depends(get_current_user)) -> User:
         )
     return current_user
 
-def require_instructor(current_user: User = Depends(get_current_user)) -> User:
+async def require_instructor(current_user: Principal = Depends(get_current_user)) -> Principal:
     if current_user.role not in ["instructor", "administrator"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -256,7 +1330,7 @@ def require_instructor(current_user: User = Depends(get_current_user)) -> User:
         )
     return current_user
 
-def require_student(current_user: User = Depends(get_current_user)) -> User:
+async def require_student(current_user: Principal = Depends(get_current_user)) -> Principal:
     if current_user.role != "student":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -264,37 +1338,1406 @@ def require_student(current_user: User = Depends(get_current_user)) -> User:
         )
     return current_user
 
-# API Routes
+# Roll call entries
+async def lock_roll_calls(db: AsyncSession, roll_call_ids):
+    """Serialize entry writers per roll call until the transaction ends, so the
+    previous statuses read before an upsert are still current when it runs."""
+    roll_call_ids = sorted(set(roll_call_ids))
+    if async_engine.dialect.name == "postgresql":
+        for roll_call_id in roll_call_ids:
+            await db.execute(select(func.pg_advisory_xact_lock(func.hashtext("roll_call_entries"), roll_call_id)))
+    else:
+        # SQLite allows one writer at a time; a no-op write takes that lock
+        # (and the app write lock) before the read instead of after it
+        await db.execute(
+            update(RollCall)
+            .where(RollCall.id.in_(roll_call_ids))
+            .values(id=RollCall.id)
+            .execution_options(synchronize_session=False)
+        )
 
-@app.get("/")
-def read_root():
-    return {
-        "message": "Student Life Management System API",
-        "version": "1.0.0",
-        "docs": "/docs"
-    }
+# A generated "present" entry only says the student was at the location; it
+# counts as attended once an instructor confirms it
+def is_candidate(entry_status: str, marked_by: Optional[int]) -> bool:
+    return entry_status == "present" and marked_by is None
 
-@app.get("/health")
-def health_check():
-    return {"status": "healthy"}
+ENTRY_CONFIRMED = or_(RollCallEntry.status != "present", RollCallEntry.marked_by.isnot(None))
 
-# Authentication routes
-@app.post("/auth/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == form_data.username).first()
-    
-    if not user or not verify_password(form_data.password, user.hashed_password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect username or password"
-        )
-    
-    if not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Inactive user"
+async def upsert_roll_call_entries(db: AsyncSession, rows: List[dict]):
+    """Write many RollCallEntry rows in one INSERT ... ON CONFLICT statement
+    and fold the status changes into attendance_summaries."""
+    await lock_roll_calls(db, (row["roll_call_id"] for row in rows))
+    previous = dict(
+        ((roll_call_id, student_id), None if is_candidate(entry_status, marked_by) else entry_status)
+        for roll_call_id, student_id, entry_status, marked_by in (await db.execute(
+            select(RollCallEntry.roll_call_id, RollCallEntry.student_id, RollCallEntry.status, RollCallEntry.marked_by)
+            .filter(
+                RollCallEntry.roll_call_id.in_({row["roll_call_id"] for row in rows}),
+                RollCallEntry.student_id.in_({row["student_id"] for row in rows})
+            )
+        )).all()
+    )
+    stmt = upsert(
+        RollCallEntry,
+        ["roll_call_id", "student_id"],
+        {"status": "status", "marked_by": "marked_by", "marked_at": func.now()}
+    )
+    await db.execute(stmt, rows)
+    await apply_attendance_changes(db, [
+        (
+            row["roll_call_id"],
+            row["student_id"],
+            previous.get((row["roll_call_id"], row["student_id"])),
+            row["status"]
         )
-    
+        for row in rows
+    ])
+
+async def populate_roll_call_entries(db: AsyncSession, roll_call_id: int) -> int:
+    """Create an entry for every active student in one INSERT ... SELECT.
+
+    Students on approved leave at the scheduled time are "excused", students
+    already at the roll call's location are "present" candidates, everyone
+    else is "absent". Generated rows have no marked_by until an instructor
+    marks them, and existing entries are left alone, so this can be re-run.
+    Candidates are left out of attendance_summaries until confirmed.
+    Returns the number of entries created.
+    """
+    await lock_roll_calls(db, [roll_call_id])
+    on_leave = select(LeaveRequest.id).where(
+        LeaveRequest.student_id == User.id,
+        LeaveRequest.status == "approved",
+        LeaveRequest.start_date <= RollCall.scheduled_time,
+        LeaveRequest.end_date > RollCall.scheduled_time
+    ).exists()
+    entry_status = case(
+        (on_leave, "excused"),
+        (User.current_location_id == RollCall.location_id, "present"),
+        else_="absent"
+    )
+    roster = (
+        select(RollCall.id, User.id, entry_status)
+        .select_from(User)
+        .join(RollCall, RollCall.id == roll_call_id)
+        .filter(User.role == "student", User.is_active == True)
+    )
+    created = (await db.execute(
+        insert_or_ignore(RollCallEntry, ["roll_call_id", "student_id"])
+        .from_select(["roll_call_id", "student_id", "status"], roster)
+        .returning(RollCallEntry.student_id, RollCallEntry.status)
+    )).all()
+    await apply_attendance_changes(db, [
+        (roll_call_id, student_id, None, entry_status)
+        for student_id, entry_status in created
+        if not is_candidate(entry_status, None)
+    ])
+    return len(created)
+
+async def count_roll_call_entries(db: AsyncSession, roll_call_id: int) -> Dict[str, int]:
+    rows = (await db.execute(
+        select(RollCallEntry.status, func.count())
+        .filter(RollCallEntry.roll_call_id == roll_call_id)
+        .group_by(RollCallEntry.status)
+    )).all()
+    return {entry_status: count for entry_status, count in rows}
+
+# Attendance summaries
+ATTENDANCE_STATUSES = ("present", "late", "absent", "excused")
+
+async def apply_attendance_changes(db: AsyncSession, changes: List[Tuple[int, int, Optional[str], str]]):
+    """Adjust attendance_summaries for entry changes given as
+    (roll_call_id, student_id, previous status or None, new status).
+
+    Each affected student, roll call and instructor row gets one
+    `count = count + delta` upsert, in key order so concurrent writers lock
+    rows in the same order.
+    """
+    deltas = defaultdict(Counter)
+    for roll_call_id, student_id, previous, entry_status in changes:
+        if previous == entry_status:
+            continue
+        for key in (("student", student_id), ("roll_call", roll_call_id)):
+            if previous is not None:
+                deltas[key][previous] -= 1
+            deltas[key][entry_status] += 1
+    if not deltas:
+        return
+    
+    roll_call_ids = [scope_id for scope, scope_id in deltas if scope == "roll_call"]
+    instructors = dict((await db.execute(
+        select(RollCall.id, RollCall.conducted_by).filter(RollCall.id.in_(roll_call_ids))
+    )).all())
+    for roll_call_id in roll_call_ids:
+        deltas[("instructor", instructors[roll_call_id])].update(deltas[("roll_call", roll_call_id)])
+    
+    stmt = upsert(AttendanceSummary, ["scope", "scope_id"], {
+        column: lambda excluded, column=column: getattr(AttendanceSummary, column) + getattr(excluded, column)
+        for column in ATTENDANCE_STATUSES
+    })
+    await db.execute(stmt, [
+        {"scope": scope, "scope_id": scope_id, **{column: counts[column] for column in ATTENDANCE_STATUSES}}
+        for (scope, scope_id), counts in sorted(deltas.items())
+    ])
+
+async def rebuild_attendance_summaries(db: AsyncSession) -> Dict[str, int]:
+    """Recompute every summary row from confirmed roll_call_entries, repairing any drift.
+
+    Returns the number of rows written per scope.
+    """
+    counts = [
+        func.coalesce(func.sum(case((RollCallEntry.status == column, 1), else_=0)), 0)
+        for column in ATTENDANCE_STATUSES
+    ]
+    columns = ["scope", "scope_id", *ATTENDANCE_STATUSES]
+    await db.execute(delete(AttendanceSummary))
+    written = {}
+    for scope, key, join in (
+        ("student", RollCallEntry.student_id, False),
+        ("roll_call", RollCallEntry.roll_call_id, False),
+        ("instructor", RollCall.conducted_by, True),
+    ):
+        summary = select(literal(scope), key, *counts).select_from(RollCallEntry).filter(ENTRY_CONFIRMED)
+        if join:
+            summary = summary.join(RollCall, RollCall.id == RollCallEntry.roll_call_id)
+        result = await db.execute(insert(AttendanceSummary).from_select(columns, summary.group_by(key)))
+        written[scope] = result.rowcount
+    await db.commit()
+    return written
+
+async def get_attendance_summary(db: AsyncSession, scope: str, scope_id: int) -> dict:
+    """One summary row (a primary key lookup) plus the attendance rate over non-excused entries."""
+    summary = await db.get(AttendanceSummary, (scope, scope_id))
+    counts = {column: getattr(summary, column) if summary else 0 for column in ATTENDANCE_STATUSES}
+    counted = counts["present"] + counts["late"] + counts["absent"]
+    return {
+        **counts,
+        "attendance_rate": round((counts["present"] + counts["late"]) / counted, 4) if counted else None
+    }
+
+# Attendance analytics
+def attendance_window(start: Optional[datetime], end: Optional[datetime]) -> Tuple[datetime, datetime]:
+    """Naive UTC [start, end); defaults to the last ATTENDANCE_REPORT_DEFAULT_DAYS."""
+    if end is None:
+        end = datetime.utcnow()
+    elif end.tzinfo is not None:
+        end = end.astimezone(timezone.utc).replace(tzinfo=None)
+    if start is None:
+        start = end - timedelta(days=ATTENDANCE_REPORT_DEFAULT_DAYS)
+    elif start.tzinfo is not None:
+        start = start.astimezone(timezone.utc).replace(tzinfo=None)
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Start must be before end"
+        )
+    return start, end
+
+async def load_attendance_frame(db: AsyncSession, start: datetime, end: datetime) -> analytics.AttendanceFrame:
+    """Confirmed entries of roll calls scheduled in [start, end) as NumPy columns.
+
+    Each roll call's entries come back as one packed string built by the
+    database (see analytics), so a term of entries is a few hundred rows.
+    """
+    in_window = (RollCall.scheduled_time >= start, RollCall.scheduled_time < end)
+    roll_calls = (await db.execute(
+        select(RollCall.id, RollCall.scheduled_time, RollCall.location_id, RollCall.conducted_by)
+        .filter(*in_window)
+    )).all()
+    packed = cast(
+        analytics.PACK_BASE + RollCallEntry.student_id * 4
+        + case(analytics.STATUS_CODES, value=RollCallEntry.status),
+        String
+    )
+    # IN (subquery) rather than a join: the entries index is scanned without
+    # a roll_calls lookup per entry
+    packed_entries = (await db.execute(
+        select(RollCallEntry.roll_call_id, func.aggregate_strings(packed, ""))
+        .filter(RollCallEntry.roll_call_id.in_(select(RollCall.id).filter(*in_window)), ENTRY_CONFIRMED)
+        .group_by(RollCallEntry.roll_call_id)
+    )).all()
+    return analytics.build_frame(roll_calls, packed_entries)
+
+# Live roll calls
+LIVE_ROLL_CALL_TOPIC = "live_roll_calls"
+
+class LiveRollCall:
+    """In-memory roster for one roll call, shared by every connected instructor.
+
+    Marks are applied to the roster and broadcast immediately; the database
+    write is batched and happens at most every LIVE_ROLL_CALL_FLUSH_INTERVAL_MS
+    or as soon as LIVE_ROLL_CALL_FLUSH_MAX_CHANGES marks are pending. Each
+    mark is also relayed to the other workers, so the worker a mark arrived on
+    is the one that writes it.
+    """
+
+    def __init__(self, roll_call_id: int, entries: Dict[int, str], student_ids: set, candidates: set):
+        self.roll_call_id = roll_call_id
+        self.entries = entries
+        self.student_ids = student_ids
+        # Students whose "present" entry was generated and not yet confirmed
+        self.candidates = candidates
+        self.pending = {}
+        self.connections = set()
+        self.completed = False
+        self._flush_lock = asyncio.Lock()
+        self._flush_task = None
+
+    async def broadcast(self, message: dict):
+        for websocket in list(self.connections):
+            try:
+                await websocket.send_json(message)
+            except Exception:
+                self.connections.discard(websocket)
+
+    async def mark(self, marks: Dict[int, str], marked_by: int):
+        # Marking a candidate "present" confirms it, so it is written too
+        changed = {
+            student_id: entry_status
+            for student_id, entry_status in marks.items()
+            if self.entries.get(student_id) != entry_status or student_id in self.candidates
+        }
+        if not changed:
+            return
+        
+        self.entries.update(changed)
+        self.candidates.difference_update(changed)
+        for student_id, entry_status in changed.items():
+            self.pending[student_id] = {
+                "roll_call_id": self.roll_call_id,
+                "student_id": student_id,
+                "status": entry_status,
+                "marked_by": marked_by
+            }
+        await self.broadcast({"type": "diff", "entries": changed, "marked_by": marked_by})
+        await live_roll_calls.relay(self.roll_call_id, {"entries": changed, "marked_by": marked_by})
+        
+        if len(self.pending) >= LIVE_ROLL_CALL_FLUSH_MAX_CHANGES:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def apply_persisted(self, marks: Dict[int, str], marked_by: Optional[int]):
+        """Fold marks written (or about to be written) elsewhere into the live roster."""
+        changed = {
+            student_id: entry_status
+            for student_id, entry_status in marks.items()
+            if self.entries.get(student_id) != entry_status
+        }
+        for student_id in marks:
+            self.pending.pop(student_id, None)
+        if marked_by is not None:
+            self.candidates.difference_update(marks)
+        self.entries.update(changed)
+        if changed:
+            await self.broadcast({"type": "diff", "entries": changed, "marked_by": marked_by})
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(LIVE_ROLL_CALL_FLUSH_INTERVAL_MS / 1000)
+            self._flush_task = None
+            await self.flush()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Flushing live roll call %s failed", self.roll_call_id)
+
+    async def flush(self) -> int:
+        async with self._flush_lock:
+            if not self.pending:
+                return 0
+            rows = list(self.pending.values())
+            self.pending = {}
+            try:
+                async with AsyncSessionLocal() as db:
+                    await upsert_roll_call_entries(db, rows)
+                    await db.commit()
+            except Exception:
+                # Keep the batch for the next flush unless a newer mark replaced it
+                for row in rows:
+                    self.pending.setdefault(row["student_id"], row)
+                if self._flush_task is None:
+                    self._flush_task = asyncio.create_task(self._flush_later())
+                raise
+            return len(rows)
+
+    async def finish(self, conducted_at: datetime):
+        self.completed = True
+        await self.broadcast({
+            "type": "completed",
+            "roll_call_id": self.roll_call_id,
+            "conducted_at": conducted_at.isoformat()
+        })
+
+class LiveRollCallHub:
+    """Registry of live roll calls in this worker process.
+
+    Marks and completions are relayed on pubsub_hub, so instructors connected
+    to different workers see the same roster, and completing a roll call on
+    one worker makes the others write the marks they still buffer.
+    """
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self._sessions = {}
+        self._lock = asyncio.Lock()
+        self._queue = None
+        self._task = None
+
+    async def start(self):
+        self._queue = pubsub_hub.subscribe(LIVE_ROLL_CALL_TOPIC, maxsize=0)
+        self._task = asyncio.create_task(self._follow())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._queue is not None:
+            pubsub_hub.unsubscribe(LIVE_ROLL_CALL_TOPIC, self._queue)
+
+    async def relay(self, roll_call_id: int, message: dict):
+        """Publish a change to the live sessions of the other workers."""
+        try:
+            await pubsub_hub.publish(LIVE_ROLL_CALL_TOPIC, json.dumps(
+                {"origin": self.origin, "roll_call_id": roll_call_id, **message}
+            ))
+        except OSError:
+            logger.exception("Relaying live roll call %s failed", roll_call_id)
+
+    async def _follow(self):
+        while True:
+            message = json.loads(await self._queue.get())
+            live = self._sessions.get(message["roll_call_id"])
+            # Our own frames come back through the broker; they are already applied
+            if message["origin"] == self.origin or live is None:
+                continue
+            if "entries" in message:
+                await live.apply_persisted(
+                    {int(student_id): entry_status for student_id, entry_status in message["entries"].items()},
+                    message["marked_by"]
+                )
+            if "completed" in message:
+                try:
+                    await live.flush()
+                except Exception:
+                    logger.exception("Flushing live roll call %s failed", live.roll_call_id)
+                await live.finish(datetime.fromisoformat(message["completed"]))
+
+    def get(self, roll_call_id: int) -> Optional[LiveRollCall]:
+        return self._sessions.get(roll_call_id)
+
+    async def join(self, roll_call_id: int, websocket: WebSocket) -> LiveRollCall:
+        async with self._lock:
+            live = self._sessions.get(roll_call_id)
+            if live is None:
+                async with AsyncSessionLocal() as db:
+                    rows = (await db.execute(
+                        select(RollCallEntry.student_id, RollCallEntry.status, RollCallEntry.marked_by)
+                        .filter(RollCallEntry.roll_call_id == roll_call_id)
+                    )).all()
+                    student_ids = set((await db.scalars(
+                        select(User.id).filter(User.role == "student")
+                    )).all())
+                live = LiveRollCall(
+                    roll_call_id,
+                    {row[0]: row[1] for row in rows},
+                    student_ids,
+                    {row[0] for row in rows if is_candidate(row[1], row[2])}
+                )
+                self._sessions[roll_call_id] = live
+            live.connections.add(websocket)
+            return live
+
+    async def leave(self, live: LiveRollCall, websocket: WebSocket):
+        live.connections.discard(websocket)
+        if live.connections:
+            return
+        try:
+            await live.flush()
+        except Exception:
+            # The session stays registered while its retry is pending
+            logger.exception("Flushing live roll call %s failed", live.roll_call_id)
+            return
+        async with self._lock:
+            if not live.connections and self._sessions.get(live.roll_call_id) is live:
+                del self._sessions[live.roll_call_id]
+
+    async def flush_all(self):
+        for live in list(self._sessions.values()):
+            try:
+                await live.flush()
+            except Exception:
+                logger.exception("Flushing live roll call %s failed", live.roll_call_id)
+
+live_roll_calls = LiveRollCallHub()
+
+async def complete_roll_call(db: AsyncSession, roll_call: RollCall) -> RollCall:
+    """Flush any live marks, then stamp conducted_at.
+
+    Other workers flush the marks they buffer when the completion reaches them.
+    """
+    live = live_roll_calls.get(roll_call.id)
+    if live is not None:
+        await live.flush()
+    
+    roll_call.conducted_at = datetime.utcnow()
+    await db.commit()
+    await db.refresh(roll_call)
+    
+    if live is not None:
+        await live.finish(roll_call.conducted_at)
+    await live_roll_calls.relay(roll_call.id, {"completed": roll_call.conducted_at.isoformat()})
+    return roll_call
+
+# Pub/sub
+class PubSubHub:
+    """In-process pub/sub for chat and presence fan-out.
+
+    Every subscriber (one per WebSocket) owns a bounded queue of frames that
+    were serialized once by the publisher, so a publish costs one put_nowait
+    per subscriber and a slow socket never holds up the others. A subscriber
+    whose queue is full misses the frame; message ids are sequential per
+    chat, so clients spot the gap and refetch history.
+    """
+
+    def __init__(self, queue_size: int = CHAT_SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.dropped = 0
+        self._topics = {}
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def subscribe(self, topic: str, maxsize: Optional[int] = None) -> asyncio.Queue:
+        """maxsize=0 gives an unbounded queue for subscribers that must not miss frames."""
+        queue = asyncio.Queue(self.queue_size if maxsize is None else maxsize)
+        self._topics.setdefault(topic, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, topic: str, queue: asyncio.Queue):
+        subscribers = self._topics.get(topic)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._topics[topic]
+
+    async def publish(self, topic: str, frame: str):
+        self._deliver(topic, frame)
+
+    def _deliver(self, topic: str, frame: str):
+        for queue in self._topics.get(topic, ()):
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                self.dropped += 1
+
+class BrokerPubSubHub(PubSubHub):
+    """Pub/sub relayed through chat_broker.py so several workers share fan-out.
+
+    Publishes only go to the broker, which echoes them to every worker
+    subscribed to the topic (this one included); each worker then delivers to
+    its own sockets exactly like PubSubHub. Topics are resubscribed after a
+    reconnect; frames published while the broker is unreachable are only
+    persisted, not pushed.
+    """
+
+    def __init__(self, url: str, queue_size: int = CHAT_SUBSCRIBER_QUEUE_SIZE):
+        super().__init__(queue_size)
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 7400
+        self._writer = None
+        self._connected = asyncio.Event()
+        self._task = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            logger.warning("Chat broker %s:%s is not reachable yet", self.host, self.port)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def subscribe(self, topic: str, maxsize: Optional[int] = None) -> asyncio.Queue:
+        first = topic not in self._topics
+        queue = super().subscribe(topic, maxsize)
+        if first:
+            self._send({"op": "sub", "topic": topic})
+        return queue
+
+    def unsubscribe(self, topic: str, queue: asyncio.Queue):
+        super().unsubscribe(topic, queue)
+        if topic not in self._topics:
+            self._send({"op": "unsub", "topic": topic})
+
+    async def publish(self, topic: str, frame: str):
+        if self._send({"op": "pub", "topic": topic, "data": frame}):
+            await self._writer.drain()
+
+    def _send(self, message: dict) -> bool:
+        if self._writer is None:
+            return False
+        self._writer.write(json.dumps(message).encode() + b"\n")
+        return True
+
+    async def _run(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port, limit=1024 * 1024)
+            except OSError:
+                await asyncio.sleep(1)
+                continue
+            self._writer = writer
+            for topic in self._topics:
+                self._send({"op": "sub", "topic": topic})
+            self._connected.set()
+            try:
+                while line := await reader.readline():
+                    message = json.loads(line)
+                    self._deliver(message["topic"], message["data"])
+            except (OSError, ValueError, KeyError):
+                logger.exception("Chat broker connection failed")
+            finally:
+                self._writer = None
+                self._connected.clear()
+                writer.close()
+            logger.warning("Lost connection to chat broker, reconnecting")
+            await asyncio.sleep(1)
+
+pubsub_hub = BrokerPubSubHub(CHAT_BROKER_URL) if CHAT_BROKER_URL else PubSubHub()
+
+async def follow_with_reload(queue: asyncio.Queue, apply, load, reload_seconds: float, name: str):
+    """Apply frames from `queue` and re-run `load` every `reload_seconds`.
+
+    For in-memory indexes fed by pub/sub: frames published while the broker
+    was unreachable are never delivered, so the index is reloaded from the
+    database now and then. Loading happens in this same task, so frames that
+    arrive meanwhile wait in the queue and are applied after the snapshot;
+    applying must therefore be idempotent.
+    """
+    reload_at = time.monotonic() + reload_seconds
+    while True:
+        timeout = reload_at - time.monotonic() if reload_seconds > 0 else None
+        if timeout is not None and timeout <= 0:
+            try:
+                await load()
+            except Exception:
+                logger.exception("Reloading the %s failed", name)
+            reload_at = time.monotonic() + reload_seconds
+            continue
+        try:
+            frame = await asyncio.wait_for(queue.get(), timeout)
+        except asyncio.TimeoutError:
+            continue
+        apply(json.loads(frame))
+
+# Location history
+def epoch_seconds(value: datetime) -> int:
+    """Naive datetimes are UTC throughout this app."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+async def compact_location_history(db: AsyncSession, cutoff: Optional[int] = None) -> int:
+    """Roll events older than the retention window into LocationHourly and delete them.
+
+    The cutoff is floored to the hour, so every hour is summarized in one go.
+    Returns the number of raw events removed.
+    """
+    if cutoff is None:
+        cutoff = int(time.time()) - LOCATION_HISTORY_RETENTION_DAYS * 86400
+    cutoff -= cutoff % 3600
+    
+    if async_engine.dialect.name == "postgresql":
+        # Concurrent workers would otherwise both summarize the same events
+        await db.execute(select(func.pg_advisory_xact_lock(func.hashtext("location_history_compaction"))))
+    
+    hour_ts = LocationEvent.ts - LocationEvent.ts % 3600
+    summary = (
+        select(
+            LocationEvent.student_id, hour_ts, LocationEvent.location_id,
+            func.count(), func.min(LocationEvent.ts), func.max(LocationEvent.ts)
+        )
+        .filter(LocationEvent.ts < cutoff)
+        .group_by(LocationEvent.student_id, hour_ts, LocationEvent.location_id)
+    )
+    stmt = upsert(
+        LocationHourly,
+        ["student_id", "hour_ts", "location_id"],
+        {
+            "events": lambda excluded: LocationHourly.events + excluded.events,
+            "first_ts": lambda excluded: case(
+                (excluded.first_ts < LocationHourly.first_ts, excluded.first_ts), else_=LocationHourly.first_ts
+            ),
+            "last_ts": lambda excluded: case(
+                (excluded.last_ts > LocationHourly.last_ts, excluded.last_ts), else_=LocationHourly.last_ts
+            )
+        }
+    )
+    await db.execute(stmt.from_select(
+        ["student_id", "hour_ts", "location_id", "events", "first_ts", "last_ts"], summary
+    ))
+    result = await db.execute(
+        delete(LocationEvent).where(LocationEvent.ts < cutoff).execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
+
+async def compact_location_history_periodically():
+    if LOCATION_HISTORY_COMPACT_INTERVAL_SECONDS <= 0:
+        return
+    while True:
+        await asyncio.sleep(LOCATION_HISTORY_COMPACT_INTERVAL_SECONDS)
+        try:
+            async with AsyncSessionLocal() as db:
+                removed = await compact_location_history(db)
+            logger.info("Compacted %s location events into hourly summaries", removed)
+        except Exception:
+            logger.exception("Location history compaction failed")
+
+# Approved leave index
+LEAVE_TOPIC = "leaves"
+
+class IntervalTree:
+    """Static centered interval tree over half-open [start, end) intervals.
+
+    A stabbing query costs O(log n + k). The tree is rebuilt instead of
+    rebalanced, which suits leave data: read on every roll call, written only
+    when a request is approved.
+    """
+
+    def __init__(self, intervals):
+        # Empty intervals contain no point and would stop the build from splitting
+        self._root = self._build([interval for interval in intervals if interval[0] < interval[1]])
+
+    def _build(self, intervals):
+        if not intervals:
+            return None
+        endpoints = sorted(point for start, end, _ in intervals for point in (start, end))
+        center = endpoints[(len(endpoints) - 1) // 2]
+        left, right, here = [], [], []
+        for interval in intervals:
+            if interval[1] <= center:
+                left.append(interval)
+            elif interval[0] > center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        return (
+            center,
+            sorted(here, key=lambda interval: interval[0]),
+            sorted(here, key=lambda interval: interval[1], reverse=True),
+            self._build(left),
+            self._build(right),
+        )
+
+    def at(self, point):
+        node = self._root
+        while node is not None:
+            center, by_start, by_end, left, right = node
+            if point < center:
+                # Every interval here ends after center, so only the start matters
+                for start, _, value in by_start:
+                    if start > point:
+                        break
+                    yield value
+                node = left
+            else:
+                for _, end, value in by_end:
+                    if end <= point:
+                        break
+                    yield value
+                node = right
+
+class ApprovedLeaveIndex:
+    """Approved leaves that had not ended at `horizon`, held in an IntervalTree.
+
+    "Who is on leave at T" is answered from memory for any T >= horizon;
+    earlier times go to the database. Changes are published on pubsub_hub so
+    the index in every worker stays the same, and the index is reloaded every
+    LEAVE_INDEX_RELOAD_SECONDS in case a change was lost.
+    """
+
+    def __init__(self):
+        self.horizon = datetime.max
+        self._leaves = {}
+        self._tree = IntervalTree(())
+        self._dirty = False
+        self._queue = None
+        self._task = None
+
+    async def start(self):
+        # Subscribe first so changes made while the snapshot loads are replayed after it
+        self._queue = pubsub_hub.subscribe(LEAVE_TOPIC, maxsize=0)
+        await self._load()
+        self._task = asyncio.create_task(self._follow())
+
+    async def _load(self):
+        horizon = datetime.utcnow() - timedelta(days=1)
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(LeaveRequest.id, LeaveRequest.student_id, LeaveRequest.start_date, LeaveRequest.end_date)
+                .filter(LeaveRequest.status == "approved", LeaveRequest.end_date > horizon)
+            )).all()
+        self._leaves = {row[0]: (row[2], row[3], row[1]) for row in rows}
+        self.horizon = horizon
+        self._dirty = True
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            pubsub_hub.unsubscribe(LEAVE_TOPIC, self._queue)
+
+    def students_at(self, at: datetime) -> Optional[set]:
+        """None when `at` is before the horizon and the database has to answer."""
+        if self._dirty:
+            # Drop leaves that ended more than a day ago and move the horizon past them
+            horizon = datetime.utcnow() - timedelta(days=1)
+            self._leaves = {
+                leave_id: leave for leave_id, leave in self._leaves.items() if leave[1] > horizon
+            }
+            self.horizon = max(self.horizon, horizon)
+            self._tree = IntervalTree(self._leaves.values())
+            self._dirty = False
+        if at < self.horizon:
+            return None
+        return set(self._tree.at(at))
+
+    async def update(self, approved=(), removed: List[int] = ()):
+        """Add newly approved leaves (anything with id, student_id, start_date
+        and end_date) and drop revoked ones, here and on every other worker."""
+        message = {
+            "approved": [
+                [leave.id, leave.student_id, leave.start_date.isoformat(), leave.end_date.isoformat()]
+                for leave in approved
+            ],
+            "removed": list(removed)
+        }
+        self._apply(message)
+        try:
+            await pubsub_hub.publish(LEAVE_TOPIC, json.dumps(message))
+        except OSError:
+            logger.exception("Publishing leave changes failed")
+
+    def _apply(self, message: dict):
+        for leave_id, student_id, start_date, end_date in message["approved"]:
+            self._leaves[leave_id] = (
+                datetime.fromisoformat(start_date), datetime.fromisoformat(end_date), student_id
+            )
+        for leave_id in message["removed"]:
+            self._leaves.pop(leave_id, None)
+        self._dirty = True
+
+    async def _follow(self):
+        await follow_with_reload(self._queue, self._apply, self._load, LEAVE_INDEX_RELOAD_SECONDS, "leave index")
+
+leave_index = ApprovedLeaveIndex()
+
+async def students_on_leave(db: AsyncSession, at: datetime, student_ids: Optional[set] = None) -> set:
+    on_leave = leave_index.students_at(at)
+    if on_leave is not None:
+        return on_leave if student_ids is None else on_leave & student_ids
+    
+    stmt = select(LeaveRequest.student_id).filter(
+        LeaveRequest.status == "approved", LeaveRequest.start_date <= at, LeaveRequest.end_date > at
+    )
+    if student_ids is not None:
+        stmt = stmt.filter(LeaveRequest.student_id.in_(student_ids))
+    return set((await db.scalars(stmt)).all())
+
+async def excuse_students_on_leave(db: AsyncSession, entries: Dict[int, str], at: datetime) -> Dict[int, str]:
+    """Turn "absent" into "excused" for students on approved leave at `at`."""
+    absent_ids = {student_id for student_id, entry_status in entries.items() if entry_status == "absent"}
+    if not absent_ids:
+        return entries
+    on_leave = await students_on_leave(db, at, absent_ids)
+    if not on_leave:
+        return entries
+    return {
+        student_id: "excused" if student_id in on_leave else entry_status
+        for student_id, entry_status in entries.items()
+    }
+
+# Live presence
+PRESENCE_TOPIC = "presence"
+
+class OccupancyListener:
+    """Pending occupancy changes for one feed client; only the latest count per location is kept."""
+
+    def __init__(self):
+        self.changes = {}
+        self.changed = asyncio.Event()
+
+class PresenceIndex:
+    """Which active students are at which location, held in memory.
+
+    Rebuilt from users.current_location_id at startup and every
+    PRESENCE_RELOAD_SECONDS, and updated on every location change, so
+    occupancy counts are O(1) and "who is in the Library" never scans users.
+    Moves are also published on pubsub_hub so the index in every other
+    worker follows along.
+    """
+
+    def __init__(self):
+        self._students_by_location = {}
+        self._location_by_student = {}
+        # Bumped on every occupancy change so cached responses know when to re-encode
+        self.version = 0
+        self._listeners = set()
+        self._queue = None
+        self._task = None
+
+    async def start(self):
+        # Subscribe first so moves made while the snapshot loads are replayed after it
+        self._queue = pubsub_hub.subscribe(PRESENCE_TOPIC, maxsize=0)
+        await self._load()
+        self._task = asyncio.create_task(self._follow())
+
+    async def _load(self):
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(User.id, User.current_location_id).filter(
+                    User.role == "student",
+                    User.is_active == True,
+                    User.current_location_id.is_not(None)
+                )
+            )).all()
+        self.rebuild(rows)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            pubsub_hub.unsubscribe(PRESENCE_TOPIC, self._queue)
+
+    def rebuild(self, rows):
+        before = self.counts()
+        self._students_by_location = {}
+        self._location_by_student = {}
+        for student_id, location_id in rows:
+            self._apply(student_id, location_id)
+        after = self.counts()
+        # Includes locations that emptied, so listeners see them drop to 0
+        self._notify({
+            location_id for location_id in before.keys() | after.keys()
+            if before.get(location_id) != after.get(location_id)
+        })
+
+    def count(self, location_id: int) -> int:
+        return len(self._students_by_location.get(location_id, ()))
+
+    def counts(self) -> Dict[int, int]:
+        return {location_id: len(students) for location_id, students in self._students_by_location.items()}
+
+    def students(self, location_id: int) -> set:
+        return set(self._students_by_location.get(location_id, ()))
+
+    async def move(self, moves: Dict[int, Optional[int]]):
+        """Apply committed location changes (None = nowhere / not a student) and publish them."""
+        changed = set()
+        for student_id, location_id in moves.items():
+            changed.update(self._apply(student_id, location_id))
+        self._notify(changed)
+        try:
+            await pubsub_hub.publish(PRESENCE_TOPIC, json.dumps(list(moves.items())))
+        except OSError:
+            logger.exception("Publishing presence changes failed")
+
+    def listen(self) -> OccupancyListener:
+        listener = OccupancyListener()
+        self._listeners.add(listener)
+        return listener
+
+    def unlisten(self, listener: OccupancyListener):
+        self._listeners.discard(listener)
+
+    def _apply(self, student_id: int, location_id: Optional[int]) -> List[int]:
+        previous = self._location_by_student.get(student_id)
+        if previous == location_id:
+            return []
+        changed = []
+        if previous is not None:
+            students = self._students_by_location[previous]
+            students.discard(student_id)
+            if not students:
+                del self._students_by_location[previous]
+            changed.append(previous)
+        if location_id is None:
+            del self._location_by_student[student_id]
+        else:
+            self._location_by_student[student_id] = location_id
+            self._students_by_location.setdefault(location_id, set()).add(student_id)
+            changed.append(location_id)
+        return changed
+
+    def _notify(self, location_ids):
+        if not location_ids:
+            return
+        self.version += 1
+        for listener in self._listeners:
+            for location_id in location_ids:
+                listener.changes[location_id] = self.count(location_id)
+            listener.changed.set()
+
+    def _apply_frame(self, moves):
+        # Our own moves come back here too; re-applying them is a no-op
+        changed = set()
+        for student_id, location_id in moves:
+            changed.update(self._apply(student_id, location_id))
+        self._notify(changed)
+
+    async def _follow(self):
+        await follow_with_reload(self._queue, self._apply_frame, self._load, PRESENCE_RELOAD_SECONDS, "presence index")
+
+presence = PresenceIndex()
+
+# Location list responses
+LOCATION_TOPIC = "locations"
+
+class CachedLocationList:
+    """One location list as read from the database, plus its encoded body.
+
+    Lists with occupancy are re-encoded from `items` when presence has moved
+    since, without going back to the database.
+    """
+    __slots__ = ("items", "headers", "body", "etag", "presence_version")
+
+    def __init__(self, items: List[dict], headers: Dict[str, str]):
+        self.items = items
+        self.headers = headers
+        self.body = None
+        self.etag = None
+        self.presence_version = None
+
+class LocationResponseCache(TTLCache):
+    """(path, query, role) -> CachedLocationList, cleared on location writes.
+
+    A write in any worker is published on LOCATION_TOPIC so every worker
+    drops its lists, and the active location ids that check-ins validate
+    against. `generation` changes on every clear, so a list read before a
+    write cannot be stored after it.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__(maxsize, ttl)
+        self.generation = 0
+        self._queue = None
+        self._task = None
+
+    async def start(self):
+        self._queue = pubsub_hub.subscribe(LOCATION_TOPIC, maxsize=0)
+        self._task = asyncio.create_task(self._follow())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            pubsub_hub.unsubscribe(LOCATION_TOPIC, self._queue)
+
+    def clear(self):
+        self.generation += 1
+        super().clear()
+        location_ids_cache.clear()
+
+    def set_if_current(self, generation: int, key, entry: CachedLocationList):
+        if generation == self.generation:
+            self.set(key, entry)
+
+    async def invalidate(self):
+        """Drop every cached list here and, via pub/sub, in the other workers."""
+        self.clear()
+        try:
+            await pubsub_hub.publish(LOCATION_TOPIC, "{}")
+        except OSError:
+            logger.exception("Publishing location invalidation failed")
+
+    async def _follow(self):
+        # Our own invalidations come back here too; clearing twice is harmless
+        while True:
+            await self._queue.get()
+            self.clear()
+
+location_responses = LocationResponseCache(LOCATION_RESPONSE_CACHE_MAX_SIZE, LOCATION_RESPONSE_CACHE_TTL_SECONDS)
+
+def location_list_key(request: Request, principal: Principal) -> tuple:
+    return (request.url.path, tuple(sorted(request.query_params.multi_items())), principal.role)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison, so W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def location_list_response(request: Request, entry: CachedLocationList, with_occupancy: bool = False) -> Response:
+    """Serve a cached list: 304 when the client's ETag still matches, else the body."""
+    presence_version = presence.version if with_occupancy else None
+    if entry.body is None or entry.presence_version != presence_version:
+        items = entry.items
+        if with_occupancy:
+            items = [{**item, "occupancy": presence.count(item["id"])} for item in items]
+        entry.body = orjson.dumps(items, option=orjson.OPT_UTC_Z)
+        entry.etag = '"' + hashlib.blake2b(entry.body, digest_size=16).hexdigest() + '"'
+        entry.presence_version = presence_version
+    headers = {**entry.headers, "ETag": entry.etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+# Roll-call scheduler
+ROLL_CALL_TOPIC = "roll_calls"
+
+async def activate_roll_call(db: AsyncSession, roll_call_id: int, now: Optional[datetime] = None) -> bool:
+    """Stamp activated_at and populate entries for a due roll call.
+
+    The claim is a conditional UPDATE, so a roll call is activated exactly
+    once however many workers try. Returns False when it was already
+    activated, completed, deactivated or is not due yet.
+    """
+    now = now or datetime.utcnow()
+    claimed = await db.execute(
+        update(RollCall)
+        .where(
+            RollCall.id == roll_call_id,
+            RollCall.activated_at.is_(None),
+            RollCall.conducted_at.is_(None),
+            RollCall.is_active == True,
+            RollCall.scheduled_time <= now
+        )
+        .values(activated_at=now)
+    )
+    if claimed.rowcount != 1:
+        await db.rollback()
+        return False
+    await populate_roll_call_entries(db, roll_call_id)
+    await db.commit()
+    return True
+
+async def sync_live_roll_call(db: AsyncSession, roll_call_id: int):
+    """Push generated entries the live session in this worker has not seen yet."""
+    live = live_roll_calls.get(roll_call_id)
+    if live is None:
+        return
+    rows = (await db.execute(
+        select(RollCallEntry.student_id, RollCallEntry.status)
+        .filter(RollCallEntry.roll_call_id == roll_call_id, RollCallEntry.marked_by.is_(None))
+    )).all()
+    # Only students the live roster has never seen; the rest may have unflushed marks
+    new_entries = {
+        student_id: entry_status for student_id, entry_status in rows if student_id not in live.entries
+    }
+    if new_entries:
+        live.student_ids.update(new_entries)
+        live.candidates.update(
+            student_id for student_id, entry_status in new_entries.items() if is_candidate(entry_status, None)
+        )
+        await live.apply_persisted(new_entries, None)
+
+class RollCallScheduler:
+    """Activates roll calls when their scheduled_time arrives.
+
+    Pending roll calls due before `horizon` sit in a heap of
+    (scheduled_time, id) and the loop sleeps until the earliest is due or a
+    new roll call jumps the queue, so roll_calls is only read when the heap
+    is (re)loaded. Only the worker holding the "roll_call_scheduler" lease
+    fires; the others just renew their bid. New roll calls are published on
+    pubsub_hub so the leader hears about them wherever they were created.
+    """
+
+    def __init__(self, name: str = "roll_call_scheduler"):
+        self.name = name
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self.horizon = datetime.min
+        self._heap = []
+        self._pending = {}
+        self._wake = asyncio.Event()
+        self._queue = None
+        self._tasks = []
+
+    async def start(self):
+        self._queue = pubsub_hub.subscribe(ROLL_CALL_TOPIC, maxsize=0)
+        self._tasks = [asyncio.create_task(self._follow())]
+        if ROLL_CALL_SCHEDULER_ENABLED:
+            self._tasks.append(asyncio.create_task(self._run()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._queue is not None:
+            pubsub_hub.unsubscribe(ROLL_CALL_TOPIC, self._queue)
+        if self.is_leader:
+            # Hand over now rather than after the lease runs out
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(SchedulerLease)
+                        .where(SchedulerLease.name == self.name, SchedulerLease.holder == self.holder)
+                        .values(expires_at=datetime.utcnow())
+                    )
+                    await db.commit()
+            except Exception:
+                logger.exception("Releasing the %s lease failed", self.name)
+            self.is_leader = False
+
+    async def add(self, roll_call_id: int, scheduled_time: datetime):
+        """Schedule a committed roll call here and on every other worker."""
+        self._schedule(roll_call_id, scheduled_time)
+        try:
+            await pubsub_hub.publish(ROLL_CALL_TOPIC, json.dumps(
+                {"scheduled": [roll_call_id, scheduled_time.isoformat()]}
+            ))
+        except OSError:
+            logger.exception("Publishing roll call %s failed", roll_call_id)
+
+    def _schedule(self, roll_call_id: int, scheduled_time: datetime):
+        # Later calls are picked up by the next reload
+        if scheduled_time >= self.horizon or self._pending.get(roll_call_id) == scheduled_time:
+            return
+        self._pending[roll_call_id] = scheduled_time
+        heapq.heappush(self._heap, (scheduled_time, roll_call_id))
+        if self._heap[0][1] == roll_call_id:
+            self._wake.set()
+
+    async def _acquire_lease(self) -> bool:
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ROLL_CALL_LEASE_SECONDS)
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                insert_or_ignore(SchedulerLease, ["name"])
+                .values(name=self.name, holder=self.holder, expires_at=expires_at)
+            )
+            renewed = await db.execute(
+                update(SchedulerLease)
+                .where(
+                    SchedulerLease.name == self.name,
+                    or_(SchedulerLease.holder == self.holder, SchedulerLease.expires_at < now)
+                )
+                .values(holder=self.holder, expires_at=expires_at)
+            )
+            await db.commit()
+        return renewed.rowcount == 1
+
+    async def _load(self):
+        now = datetime.utcnow()
+        horizon = now + timedelta(seconds=2 * ROLL_CALL_SCHEDULER_RELOAD_SECONDS)
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(RollCall.id, RollCall.scheduled_time).filter(
+                    RollCall.activated_at.is_(None),
+                    RollCall.scheduled_time >= now - timedelta(seconds=ROLL_CALL_SCHEDULER_GRACE_SECONDS),
+                    RollCall.scheduled_time < horizon,
+                    RollCall.conducted_at.is_(None),
+                    RollCall.is_active == True
+                )
+            )).all()
+        self._pending = {roll_call_id: scheduled_time for roll_call_id, scheduled_time in rows}
+        self._heap = [(scheduled_time, roll_call_id) for roll_call_id, scheduled_time in rows]
+        heapq.heapify(self._heap)
+        self.horizon = horizon
+
+    async def _fire_due(self):
+        now = datetime.utcnow()
+        while self._heap and self._heap[0][0] <= now:
+            scheduled_time, roll_call_id = heapq.heappop(self._heap)
+            # Entries superseded by a later _schedule call are skipped
+            if self._pending.get(roll_call_id) != scheduled_time:
+                continue
+            del self._pending[roll_call_id]
+            try:
+                async with AsyncSessionLocal() as db:
+                    activated = await activate_roll_call(db, roll_call_id, now)
+                if activated:
+                    await pubsub_hub.publish(ROLL_CALL_TOPIC, json.dumps({"activated": roll_call_id}))
+            except Exception:
+                logger.exception("Activating roll call %s failed", roll_call_id)
+
+    async def _run(self):
+        renew_interval = ROLL_CALL_LEASE_SECONDS / 3
+        next_renew = next_reload = 0.0
+        while True:
+            self._wake.clear()
+            if time.monotonic() >= next_renew:
+                try:
+                    leader = await self._acquire_lease()
+                except Exception:
+                    logger.exception("Renewing the %s lease failed", self.name)
+                    leader = False
+                if leader and not self.is_leader:
+                    logger.info("Acquired the %s lease", self.name)
+                    next_reload = 0.0
+                elif not leader:
+                    self._heap, self._pending, self.horizon = [], {}, datetime.min
+                self.is_leader = leader
+                next_renew = time.monotonic() + renew_interval
+
+            wake_at = next_renew
+            if self.is_leader:
+                if time.monotonic() >= next_reload:
+                    try:
+                        await self._load()
+                        next_reload = time.monotonic() + ROLL_CALL_SCHEDULER_RELOAD_SECONDS
+                    except Exception:
+                        logger.exception("Loading scheduled roll calls failed")
+                        # Retry with the next lease renewal rather than spinning
+                        next_reload = time.monotonic() + renew_interval
+                await self._fire_due()
+                wake_at = min(wake_at, next_reload)
+                if self._heap:
+                    due_in = (self._heap[0][0] - datetime.utcnow()).total_seconds()
+                    wake_at = min(wake_at, time.monotonic() + due_in)
+            try:
+                await asyncio.wait_for(self._wake.wait(), max(0.0, wake_at - time.monotonic()))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _follow(self):
+        while True:
+            message = json.loads(await self._queue.get())
+            if "scheduled" in message:
+                roll_call_id, scheduled_time = message["scheduled"]
+                self._schedule(roll_call_id, datetime.fromisoformat(scheduled_time))
+            if "activated" in message:
+                try:
+                    async with AsyncSessionLocal() as db:
+                        await sync_live_roll_call(db, message["activated"])
+                except Exception:
+                    logger.exception("Updating live roll call %s failed", message["activated"])
+
+roll_call_scheduler = RollCallScheduler()
+
+def chat_topic(group_chat_id: int) -> str:
+    return f"group_chat:{group_chat_id}"
+
+async def get_group_chat_for_member(db: AsyncSession, group_chat_id: int, current_user: Principal) -> GroupChat:
+    group_chat = await db.get(GroupChat, group_chat_id)
+    if not group_chat or not group_chat.is_active:
+        raise HTTPException(status_code=404, detail="Group chat not found")
+    if current_user.role != "administrator":
+        membership = await db.scalar(
+            select(GroupChatMember.id).filter(
+                GroupChatMember.group_chat_id == group_chat_id,
+                GroupChatMember.user_id == current_user.id
+            )
+        )
+        if membership is None:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not a member of this group chat"
+            )
+    return group_chat
+
+async def post_group_chat_message(
+    db: AsyncSession, group_chat_id: int, sender_id: int, body: str
+) -> GroupChatMessage:
+    """Append a message, then fan it out to every subscriber of the chat."""
+    message = GroupChatMessage(group_chat_id=group_chat_id, sender_id=sender_id, body=body)
+    db.add(message)
+    await db.commit()
+    await db.refresh(message)
+    
+    frame = json.dumps({
+        "type": "message",
+        "message": GroupChatMessageResponse.model_validate(message).model_dump(mode="json")
+    })
+    try:
+        await pubsub_hub.publish(chat_topic(group_chat_id), frame)
+    except OSError:
+        logger.exception("Publishing group chat message %s failed", message.id)
+    return message
+
+# API Routes
+
+@app.exception_handler(DatabaseBusy)
+@app.exception_handler(PoolTimeoutError)
+def database_busy_handler(request: Request, exc: Exception):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Database is busy, please retry"},
+        headers={"Retry-After": "1"}
+    )
+
+@app.exception_handler(HashingPoolOverloaded)
+def hashing_pool_overloaded_handler(request: Request, exc: HashingPoolOverloaded):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Authentication service is busy, please retry"},
+        headers={"Retry-After": "1"}
+    )
+
+def _pool_stats(pool) -> dict:
+    if isinstance(pool, InstrumentedQueuePool):
+        return pool.stats()
+    return {"pool": type(pool).__name__, "status": pool.status()}
+
+@app.get("/")
+async def read_root():
+    return {
+        "message": "Student Life Management System API",
+        "version": "1.0.0",
+        "docs": "/docs"
+    }
+
+@app.get("/health")
+async def health_check():
+    return {"status": "healthy"}
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    """Prometheus scrape endpoint for this worker."""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if METRICS_TOKEN and not hmac.compare_digest(
+        request.headers.get("authorization", ""), f"Bearer {METRICS_TOKEN}"
+    ):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Authentication routes
+@app.post("/auth/login", response_model=Token)
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(User).filter(User.username == form_data.username))
+    
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password"
+        )
+    
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Inactive user"
+        )
+    
     access_token = create_access_token(data={"sub": str(user.id)})
     return {
         "access_token": access_token,
@@ -303,22 +2746,22 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     }
 
 @app.post("/auth/register", response_model=UserResponse)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
-    existing_user = db.query(User).filter(User.username == user_data.username).first()
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    existing_user = await db.scalar(select(User.id).filter(User.username == user_data.username))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
         )
     
-    existing_email = db.query(User).filter(User.email == user_data.email).first()
+    existing_email = await db.scalar(select(User.id).filter(User.email == user_data.email))
     if existing_email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     db_user = User(
         email=user_data.email,
         username=user_data.username,
@@ -331,39 +2774,47 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 @app.get("/auth/me", response_model=UserResponse)
-def get_current_user_info(current_user: User = Depends(get_current_user)):
-    return current_user
+async def get_current_user_info(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    user = (await db.execute(select(*USER_RESPONSE_COLUMNS).filter(User.id == current_user.id))).first()
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
 
 # Admin routes
 @app.get("/admin/users", response_model=List[UserResponse])
-def get_all_users(
+async def get_all_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_admin)
 ):
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    users = await paginate(db, select(*USER_RESPONSE_COLUMNS), User, response, skip, limit, cursor)
+    return list_response(users, response)
 
 @app.post("/admin/users", response_model=UserResponse)
-def create_user(
+async def create_user(
     user_data: UserCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_admin)
 ):
-    existing_user = db.query(User).filter(User.username == user_data.username).first()
+    existing_user = await db.scalar(select(User.id).filter(User.username == user_data.username))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
         )
     
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     db_user = User(
         email=user_data.email,
         username=user_data.username,
@@ -376,109 +2827,796 @@ def create_user(
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
+@app.put("/admin/users/{user_id}", response_model=UserResponse)
+async def update_user(
+    user_id: int,
+    user_data: UserUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_admin)
+):
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    changes = user_data.dict(exclude_unset=True)
+    if changes.get("email") is not None and await db.scalar(
+        select(User.id).filter(User.email == changes["email"], User.id != user_id)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+    if changes.get("student_id") is not None and await db.scalar(
+        select(User.id).filter(User.student_id == changes["student_id"], User.id != user_id)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Student ID already registered"
+        )
+    
+    for field, value in changes.items():
+        setattr(user, field, value)
+    
+    await db.commit()
+    await db.refresh(user)
+    await principal_cache.invalidate_users([user_id])
+    if "role" in changes or "is_active" in changes:
+        is_present = user.role == "student" and user.is_active
+        await presence.move({user.id: user.current_location_id if is_present else None})
+    return user
+
+@app.delete("/admin/users/{user_id}")
+async def delete_user(
+    user_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_admin)
+):
+    """Deactivate rather than delete: roll-call entries, leave requests, chat
+    history, location events and attendance summaries all keep pointing at
+    the user."""
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    user.is_active = False
+    await db.commit()
+    await principal_cache.invalidate_users([user_id])
+    await presence.move({user_id: None})
+    return {"detail": "User deactivated"}
+
+@app.get("/admin/system/hashing-pool")
+async def get_hashing_pool_stats(current_user: Principal = Depends(require_admin)):
+    return hashing_pool.stats()
+
+@app.post("/admin/system/location-history/compact")
+async def compact_location_history_now(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_admin)
+):
+    return {"compacted_events": await compact_location_history(db)}
+
+@app.post("/admin/system/attendance-summaries/rebuild")
+async def rebuild_attendance_summaries_now(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_admin)
+):
+    return {"rebuilt": await rebuild_attendance_summaries(db)}
+
+@app.get("/admin/system/db-pool")
+async def get_db_pool_stats(current_user: Principal = Depends(require_admin)):
+    return _pool_stats(async_engine.pool)
+
+@app.get("/admin/reports/attendance/instructors", response_model=List[InstructorAttendanceTrend])
+async def get_instructor_attendance_trend(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bucket: Literal["day", "week"] = "week",
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_admin)
+):
+    """Attendance at each instructor's roll calls per day or week."""
+    start, end = attendance_window(start, end)
+    frame = await load_attendance_frame(db, start, end)
+    return [
+        {"instructor_id": instructor_id, "bucket_start": bucket_start, **fields}
+        for instructor_id, bucket_start, fields in analytics.trend_report(frame, frame.instructor_ids, bucket)
+    ]
+
 @app.get("/admin/locations", response_model=List[LocationResponse])
-def get_all_locations(
+async def get_all_locations(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_admin)
 ):
-    locations = db.query(Location).offset(skip).limit(limit).all()
-    return locations
+    key = location_list_key(request, current_user)
+    entry = location_responses.get(key)
+    if entry is None:
+        generation = location_responses.generation
+        locations = await paginate(db, select(*LOCATION_RESPONSE_COLUMNS), Location, response, skip, limit, cursor)
+        entry = CachedLocationList([location._asdict() for location in locations], dict(response.headers))
+        location_responses.set_if_current(generation, key, entry)
+    return location_list_response(request, entry)
 
 @app.post("/admin/locations", response_model=LocationResponse)
-def create_location(
+async def create_location(
     location_data: LocationBase,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_admin)
 ):
     db_location = Location(**location_data.dict())
     db.add(db_location)
-    db.commit()
-    db.refresh(db_location)
+    await db.commit()
+    await db.refresh(db_location)
+    await location_responses.invalidate()
     return db_location
 
+@app.put("/admin/locations/{location_id}", response_model=LocationResponse)
+async def update_location(
+    location_id: int,
+    location_data: LocationUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_admin)
+):
+    location = await db.get(Location, location_id)
+    if not location:
+        raise HTTPException(status_code=404, detail="Location not found")
+    
+    for field, value in location_data.dict(exclude_unset=True).items():
+        setattr(location, field, value)
+    
+    await db.commit()
+    await db.refresh(location)
+    await location_responses.invalidate()
+    return location
+
 @app.get("/admin/dashboard/stats")
-def get_admin_stats(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+async def get_admin_stats(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_admin)
 ):
-    total_students = db.query(User).filter(User.role == "student").count()
-    total_instructors = db.query(User).filter(User.role == "instructor").count()
-    total_locations = db.query(Location).filter(Location.is_active == True).count()
+    key = ("administrator",)
+    stats = stats_cache.get(key)
+    if stats is None:
+        active_locations = (
+            select(func.count(Location.id))
+            .where(Location.is_active == True)
+            .scalar_subquery()
+        )
+        row = (await db.execute(select(
+            func.coalesce(func.sum(case((User.role == "student", 1), else_=0)), 0),
+            func.coalesce(func.sum(case((User.role == "instructor", 1), else_=0)), 0),
+            active_locations
+        ).where(User.is_active == True))).one()
+        stats = {
+            "total_students": row[0],
+            "total_instructors": row[1],
+            "total_locations": row[2]
+        }
+        stats_cache.set(key, stats)
     
-    return {
-        "total_students": total_students,
-        "total_instructors": total_instructors,
-        "total_locations": total_locations
-    }
+    return stats
 
 # Instructor routes
 @app.get("/instructor/students", response_model=List[UserResponse])
-def get_students(
+async def get_students(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_instructor)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_instructor)
 ):
-    students = db.query(User).filter(User.role == "student").offset(skip).limit(limit).all()
-    return students
+    students = await paginate(
+        db, select(*USER_RESPONSE_COLUMNS).filter(User.role == "student", User.is_active == True), User, response, skip, limit, cursor
+    )
+    return list_response(students, response)
 
 @app.put("/instructor/students/{student_id}/location", response_model=UserResponse)
-def update_student_location(
+async def update_student_location(
     student_id: int,
     location_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_instructor)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_instructor)
 ):
-    student = db.query(User).filter(User.id == student_id, User.role == "student").first()
+    student = await db.scalar(select(User).filter(User.id == student_id, User.role == "student"))
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     
-    location = db.query(Location).filter(Location.id == location_id).first()
+    location = await db.get(Location, location_id)
     if not location:
         raise HTTPException(status_code=404, detail="Location not found")
     
+    moved_at = datetime.utcnow()
     student.current_location_id = location_id
-    db.commit()
-    db.refresh(student)
+    student.location_updated_at = moved_at
+    db.add(LocationEvent(student_id=student_id, location_id=location_id, ts=epoch_seconds(moved_at)))
+    await db.commit()
+    await db.refresh(student)
+    await principal_cache.invalidate_users([student_id])
+    if student.is_active:
+        await presence.move({student_id: location_id})
     return student
 
+@app.post("/instructor/locations/check-ins", response_model=LocationCheckInResult)
+async def check_in_students(
+    batch: LocationCheckInBatch,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_instructor)
+):
+    """Apply a batch of gate scans in one transaction.
+
+    Only the latest scan per student is kept, and it is applied only if it is
+    newer than the student's location_updated_at, so a retried batch
+    changes nothing. Scans for unknown or inactive locations and students
+    are skipped and reported back.
+    """
+    location_ids = await get_active_location_ids(db)
+    latest = {}
+    scans_by_student = Counter()
+    unknown_location_ids = set()
+    for student_id, location_id, scanned_at in batch.check_ins:
+        if location_id not in location_ids:
+            unknown_location_ids.add(location_id)
+            continue
+        if scanned_at.tzinfo is not None:
+            scanned_at = scanned_at.astimezone(timezone.utc).replace(tzinfo=None)
+        scans_by_student[student_id] += 1
+        if student_id not in latest or scanned_at > latest[student_id][1]:
+            latest[student_id] = (location_id, scanned_at)
+    
+    moves = {}
+    unknown_student_ids = set(latest)
+    if latest:
+        rows = (await db.execute(
+            select(User.id, User.location_updated_at).filter(
+                User.id.in_(latest), User.role == "student", User.is_active == True
+            )
+        )).all()
+        for student_id, location_updated_at in rows:
+            unknown_student_ids.discard(student_id)
+            if location_updated_at is None or latest[student_id][1] > location_updated_at:
+                moves[student_id] = latest[student_id]
+    
+    if moves:
+        scanned_at_by_id = {student_id: scanned_at for student_id, (_, scanned_at) in moves.items()}
+        # The timestamp guard is repeated in SQL so a concurrent newer move still
+        # wins; only the rows it let through are recorded and published
+        applied_ids = set((await db.scalars(
+            update(User)
+            .where(
+                User.id.in_(moves),
+                or_(
+                    User.location_updated_at.is_(None),
+                    User.location_updated_at < case(scanned_at_by_id, value=User.id)
+                )
+            )
+            .values(
+                current_location_id=case(
+                    {student_id: location_id for student_id, (location_id, _) in moves.items()}, value=User.id
+                ),
+                location_updated_at=case(scanned_at_by_id, value=User.id)
+            )
+            .returning(User.id)
+            .execution_options(synchronize_session=False)
+        )).all())
+        moves = {student_id: move for student_id, move in moves.items() if student_id in applied_ids}
+    
+    if moves:
+        await db.execute(insert(LocationEvent), [
+            {"student_id": student_id, "location_id": location_id, "ts": epoch_seconds(scanned_at)}
+            for student_id, (location_id, scanned_at) in moves.items()
+        ])
+    await db.commit()
+    if moves:
+        await principal_cache.invalidate_users(moves)
+        await presence.move({student_id: location_id for student_id, (location_id, _) in moves.items()})
+    
+    accepted = sum(count for student_id, count in scans_by_student.items() if student_id not in unknown_student_ids)
+    return {
+        "received": len(batch.check_ins),
+        "applied": len(moves),
+        "stale": accepted - len(moves),
+        "unknown_student_ids": sorted(unknown_student_ids),
+        "unknown_location_ids": sorted(unknown_location_ids)
+    }
+
+@app.get("/instructor/locations/{location_id}/students", response_model=List[UserResponse])
+async def get_students_at_location(
+    location_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_instructor)
+):
+    if not await db.get(Location, location_id):
+        raise HTTPException(status_code=404, detail="Location not found")
+    
+    student_ids = presence.students(location_id)
+    if not student_ids:
+        return []
+    students = await db.execute(select(*USER_RESPONSE_COLUMNS).filter(User.id.in_(student_ids)).order_by(User.id))
+    return list_response(students.all())
+
+@app.get("/instructor/leave-requests/pending", response_model=List[LeaveRequestResponse])
+async def get_pending_leave_requests(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_instructor)
+):
+    """Approval queue, oldest first; page with X-Next-Cursor."""
+    return await paginate(
+        db, select(LeaveRequest).filter(LeaveRequest.status == "pending"),
+        LeaveRequest, response, skip, limit, cursor
+    )
+
+@app.post("/instructor/leave-requests/decisions", response_model=LeaveRequestBatchDecisionResult)
+async def decide_leave_requests(
+    batch: LeaveRequestBatchDecision,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_instructor)
+):
+    """Approve or reject many pending requests with a single UPDATE.
+
+    approved_by/approved_at record who decided, for rejections too. Ids that
+    do not exist or are no longer pending are returned as skipped.
+    """
+    decided = []
+    if batch.decisions:
+        decided = (await db.execute(
+            update(LeaveRequest)
+            .where(LeaveRequest.id.in_(batch.decisions), LeaveRequest.status == "pending")
+            .values(
+                status=case(batch.decisions, value=LeaveRequest.id),
+                approved_by=current_user.id,
+                approved_at=func.now()
+            )
+            .returning(
+                LeaveRequest.id, LeaveRequest.student_id, LeaveRequest.status,
+                LeaveRequest.start_date, LeaveRequest.end_date
+            )
+            .execution_options(synchronize_session=False)
+        )).all()
+        await db.commit()
+    
+    for student_id in {row.student_id for row in decided}:
+        stats_cache.pop(("student", student_id))
+    approved = [row for row in decided if row.status == "approved"]
+    if approved:
+        await leave_index.update(approved=approved)
+    
+    decided_ids = {row.id for row in decided}
+    return {
+        "approved": sorted(row.id for row in approved),
+        "rejected": sorted(row.id for row in decided if row.status == "rejected"),
+        "skipped": sorted(set(batch.decisions) - decided_ids)
+    }
+
+@app.get("/instructor/students/on-leave", response_model=OnLeaveResponse)
+async def get_students_on_leave(
+    at: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_instructor)
+):
+    """Students on approved leave at `at` (default: now)."""
+    if at is None:
+        at = datetime.utcnow()
+    elif at.tzinfo is not None:
+        at = at.astimezone(timezone.utc).replace(tzinfo=None)
+    return {"at": at, "student_ids": sorted(await students_on_leave(db, at))}
+
+@app.get("/instructor/students/{student_id}/location-history", response_model=LocationHistoryResponse)
+async def get_student_location_history(
+    student_id: int,
+    start: datetime,
+    end: datetime,
+    limit: int = Query(1000, le=10000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_instructor)
+):
+    """Where a student was between start and end, oldest first."""
+    start_ts, end_ts = epoch_seconds(start), epoch_seconds(end)
+    events = await db.scalars(
+        select(LocationEvent)
+        .filter(LocationEvent.student_id == student_id, LocationEvent.ts >= start_ts, LocationEvent.ts < end_ts)
+        .order_by(LocationEvent.ts)
+        .limit(limit)
+    )
+    hourly = await db.scalars(
+        select(LocationHourly)
+        .filter(
+            LocationHourly.student_id == student_id,
+            LocationHourly.hour_ts >= start_ts - start_ts % 3600,
+            LocationHourly.hour_ts < end_ts
+        )
+        .order_by(LocationHourly.hour_ts)
+        .limit(limit)
+    )
+    return {"events": events.all(), "hourly": hourly.all()}
+
+@app.get("/instructor/students/{student_id}/location-at", response_model=LocationAtResponse)
+async def get_student_location_at(
+    student_id: int,
+    at: datetime,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_instructor)
+):
+    """The student's location at a point in time, from the last move before it."""
+    at_ts = epoch_seconds(at)
+    # Everything still in location_events is newer than anything compacted
+    event = await db.scalar(
+        select(LocationEvent)
+        .filter(LocationEvent.student_id == student_id, LocationEvent.ts <= at_ts)
+        .order_by(LocationEvent.ts.desc())
+        .limit(1)
+    )
+    if event is not None:
+        return {"student_id": student_id, "at": at_ts, "location_id": event.location_id, "since": event.ts, "source": "event"}
+    
+    summary = await db.scalar(
+        select(LocationHourly)
+        .filter(LocationHourly.student_id == student_id, LocationHourly.first_ts <= at_ts)
+        .order_by(LocationHourly.hour_ts.desc(), LocationHourly.last_ts.desc())
+        .limit(1)
+    )
+    if summary is not None:
+        return {"student_id": student_id, "at": at_ts, "location_id": summary.location_id, "since": summary.first_ts, "source": "hourly"}
+    return {"student_id": student_id, "at": at_ts}
+
+@app.get("/instructor/locations/{location_id}/history", response_model=LocationHistoryResponse)
+async def get_location_history(
+    location_id: int,
+    start: datetime,
+    end: datetime,
+    limit: int = Query(1000, le=10000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_instructor)
+):
+    """Arrivals at a location between start and end, oldest first."""
+    start_ts, end_ts = epoch_seconds(start), epoch_seconds(end)
+    events = await db.scalars(
+        select(LocationEvent)
+        .filter(LocationEvent.location_id == location_id, LocationEvent.ts >= start_ts, LocationEvent.ts < end_ts)
+        .order_by(LocationEvent.ts)
+        .limit(limit)
+    )
+    hourly = await db.scalars(
+        select(LocationHourly)
+        .filter(
+            LocationHourly.location_id == location_id,
+            LocationHourly.hour_ts >= start_ts - start_ts % 3600,
+            LocationHourly.hour_ts < end_ts
+        )
+        .order_by(LocationHourly.hour_ts)
+        .limit(limit)
+    )
+    return {"events": events.all(), "hourly": hourly.all()}
+
 @app.get("/instructor/dashboard/stats")
-def get_instructor_stats(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_instructor)
+async def get_instructor_stats(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_instructor)
+):
+    key = ("instructor", current_user.id)
+    stats = stats_cache.get(key)
+    if stats is None:
+        total_students = (
+            select(func.count(User.id))
+            .where(User.role == "student", User.is_active == True)
+            .scalar_subquery()
+        )
+        total_roll_calls = (
+            select(func.count(RollCall.id))
+            .where(RollCall.conducted_by == current_user.id)
+            .scalar_subquery()
+        )
+        row = (await db.execute(select(total_students, total_roll_calls))).one()
+        stats = {
+            "total_students": row[0],
+            "total_roll_calls": row[1],
+            "attendance": await get_attendance_summary(db, "instructor", current_user.id)
+        }
+        stats_cache.set(key, stats)
+    
+    return stats
+
+async def get_roll_call_for_instructor(
+    db: AsyncSession, roll_call_id: int, current_user: Principal
+) -> RollCall:
+    roll_call = await db.get(RollCall, roll_call_id)
+    if not roll_call:
+        raise HTTPException(status_code=404, detail="Roll call not found")
+    
+    if current_user.role != "administrator" and roll_call.conducted_by != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Roll call belongs to another instructor"
+        )
+    return roll_call
+
+@app.get("/instructor/roll-calls", response_model=List[RollCallResponse])
+async def get_roll_calls(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_instructor)
+):
+    roll_calls = await paginate(
+        db, select(RollCall).filter(RollCall.conducted_by == current_user.id),
+        RollCall, response, skip, limit, cursor
+    )
+    return roll_calls
+
+@app.post("/instructor/roll-calls", response_model=RollCallResponse)
+async def create_roll_call(
+    roll_call_data: RollCallBase,
+    populate: bool = True,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_instructor)
 ):
-    total_students = db.query(User).filter(User.role == "student").count()
-    total_roll_calls = db.query(RollCall).filter(RollCall.conducted_by == current_user.id).count()
+    """Create a roll call; it is activated (entries generated for every active
+    student) at scheduled_time, or right away if that has passed.
+
+    populate=false creates a manual roll call that is never auto-populated.
+    """
+    if roll_call_data.location_id is not None and not await db.get(Location, roll_call_data.location_id):
+        raise HTTPException(status_code=404, detail="Location not found")
+    
+    scheduled_time = roll_call_data.scheduled_time
+    if scheduled_time.tzinfo is not None:
+        scheduled_time = scheduled_time.astimezone(timezone.utc).replace(tzinfo=None)
+    db_roll_call = RollCall(
+        **roll_call_data.dict(exclude={"scheduled_time"}),
+        scheduled_time=scheduled_time,
+        conducted_by=current_user.id,
+        activated_at=None if populate else datetime.utcnow()
+    )
+    db.add(db_roll_call)
+    await db.commit()
+    if populate and scheduled_time <= datetime.utcnow():
+        await activate_roll_call(db, db_roll_call.id)
+    elif populate:
+        await roll_call_scheduler.add(db_roll_call.id, scheduled_time)
+    await db.refresh(db_roll_call)
+    stats_cache.pop(("instructor", current_user.id))
+    return db_roll_call
+
+@app.post("/instructor/roll-calls/{roll_call_id}/populate", response_model=RollCallPopulateResult)
+async def populate_roll_call(
+    roll_call_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_instructor)
+):
+    """Add entries for students who have none yet (e.g. enrolled after creation)."""
+    await get_roll_call_for_instructor(db, roll_call_id, current_user)
+    created = await populate_roll_call_entries(db, roll_call_id)
+    await db.commit()
+    
+    if created:
+        await sync_live_roll_call(db, roll_call_id)
     
     return {
-        "total_students": total_students,
-        "total_roll_calls": total_roll_calls
+        "roll_call_id": roll_call_id,
+        "created": created,
+        "counts": await count_roll_call_entries(db, roll_call_id)
     }
 
+@app.put("/instructor/roll-calls/{roll_call_id}/entries", response_model=RollCallBulkMarkResult)
+async def mark_roll_call_entries(
+    roll_call_id: int,
+    marks: RollCallBulkMark,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_instructor)
+):
+    roll_call = await get_roll_call_for_instructor(db, roll_call_id, current_user)
+    
+    entries = marks.entries
+    if entries:
+        student_ids = set(entries)
+        known_ids = set((await db.scalars(
+            select(User.id).filter(User.id.in_(student_ids), User.role == "student")
+        )).all())
+        unknown_ids = sorted(student_ids - known_ids)
+        if unknown_ids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown student ids: {unknown_ids}"
+            )
+        
+        entries = await excuse_students_on_leave(db, entries, roll_call.scheduled_time)
+        await upsert_roll_call_entries(db, [
+            {
+                "roll_call_id": roll_call_id,
+                "student_id": student_id,
+                "status": entry_status,
+                "marked_by": current_user.id
+            }
+            for student_id, entry_status in entries.items()
+        ])
+        await db.commit()
+        
+        live = live_roll_calls.get(roll_call_id)
+        if live is not None:
+            await live.apply_persisted(entries, current_user.id)
+        await live_roll_calls.relay(roll_call_id, {"entries": entries, "marked_by": current_user.id})
+    
+    return {
+        "roll_call_id": roll_call_id,
+        "marked": len(entries),
+        "counts": dict(Counter(entries.values())),
+        "auto_excused": sum(entries[student_id] != marks.entries[student_id] for student_id in entries)
+    }
+
+@app.post("/instructor/roll-calls/{roll_call_id}/complete", response_model=RollCallResponse)
+async def finish_roll_call(
+    roll_call_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_instructor)
+):
+    roll_call = await get_roll_call_for_instructor(db, roll_call_id, current_user)
+    return await complete_roll_call(db, roll_call)
+
+@app.websocket("/instructor/roll-calls/{roll_call_id}/live")
+async def live_roll_call(websocket: WebSocket, roll_call_id: int, token: str):
+    """Live marking session.
+
+    Browsers cannot set headers on WebSocket requests, so the bearer token is
+    passed as ?token=. The server sends a "snapshot" on connect and a "diff"
+    for every change; clients send {"type": "mark", "entries": {id: status}}
+    and {"type": "complete"}.
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            current_user = await require_instructor(await authenticate_token(token, db))
+            roll_call = await get_roll_call_for_instructor(db, roll_call_id, current_user)
+        except HTTPException as exc:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=exc.detail)
+            return
+        if roll_call.conducted_at is not None:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Roll call already completed")
+            return
+        scheduled_time = roll_call.scheduled_time
+    
+    await websocket.accept()
+    live = await live_roll_calls.join(roll_call_id, websocket)
+    try:
+        await websocket.send_json({"type": "snapshot", "roll_call_id": roll_call_id, "entries": live.entries})
+        while True:
+            message = await websocket.receive_json()
+            message_type = message.get("type") if isinstance(message, dict) else None
+            if live.completed:
+                await websocket.send_json({"type": "error", "detail": "Roll call already completed"})
+            elif message_type == "mark":
+                try:
+                    marks = RollCallBulkMark(entries=message.get("entries", {}))
+                except ValidationError as exc:
+                    await websocket.send_json({"type": "error", "detail": exc.errors(include_url=False, include_context=False)})
+                    continue
+                unknown_ids = sorted(set(marks.entries) - live.student_ids)
+                if unknown_ids:
+                    await websocket.send_json({"type": "error", "detail": f"Unknown student ids: {unknown_ids}"})
+                    continue
+                try:
+                    async with AsyncSessionLocal() as db:
+                        entries = await excuse_students_on_leave(db, marks.entries, scheduled_time)
+                    await live.mark(entries, current_user.id)
+                except Exception:
+                    # Marks that reached the roster stay queued for the next flush
+                    logger.exception("Marking live roll call %s failed", roll_call_id)
+                    await websocket.send_json({"type": "error", "detail": "Saving marks failed, they will be retried"})
+            elif message_type == "complete":
+                try:
+                    async with AsyncSessionLocal() as db:
+                        roll_call = await db.get(RollCall, roll_call_id)
+                        await complete_roll_call(db, roll_call)
+                except Exception:
+                    logger.exception("Completing live roll call %s failed", roll_call_id)
+                    await websocket.send_json({"type": "error", "detail": "Completing the roll call failed, please retry"})
+            else:
+                await websocket.send_json({"type": "error", "detail": "Unknown message type"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await live_roll_calls.leave(live, websocket)
+
+@app.get("/instructor/reports/attendance/students", response_model=List[StudentAttendanceReport])
+async def get_student_attendance_report(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    chronic_only: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_instructor)
+):
+    """Per-student counts, attendance rate, late streaks and chronic-absence flag."""
+    start, end = attendance_window(start, end)
+    frame = await load_attendance_frame(db, start, end)
+    report = analytics.student_report(frame, ATTENDANCE_CHRONIC_ABSENCE_RATE)
+    if chronic_only:
+        report = [row for row in report if row["chronic_absence"]]
+    return report
+
+@app.get("/instructor/reports/attendance/locations", response_model=List[LocationAttendanceTrend])
+async def get_location_attendance_trend(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bucket: Literal["day", "week"] = "week",
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_instructor)
+):
+    """Attendance per location and day or week (location_id null: roll calls without one)."""
+    start, end = attendance_window(start, end)
+    frame = await load_attendance_frame(db, start, end)
+    return [
+        {"location_id": location_id or None, "bucket_start": bucket_start, **fields}
+        for location_id, bucket_start, fields in analytics.trend_report(frame, frame.location_ids, bucket)
+    ]
+
+@app.post("/instructor/group-chats", response_model=GroupChatResponse)
+async def create_group_chat(
+    chat_data: GroupChatCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_instructor)
+):
+    member_ids = set(chat_data.member_ids) - {current_user.id}
+    if member_ids:
+        known_ids = set((await db.scalars(
+            select(User.id).filter(User.id.in_(member_ids), User.is_active == True)
+        )).all())
+        unknown_ids = sorted(member_ids - known_ids)
+        if unknown_ids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown user ids: {unknown_ids}"
+            )
+    
+    group_chat = GroupChat(
+        name=chat_data.name,
+        description=chat_data.description,
+        created_by=current_user.id
+    )
+    db.add(group_chat)
+    await db.flush()
+    await db.execute(insert(GroupChatMember), [
+        {"group_chat_id": group_chat.id, "user_id": current_user.id, "role": "admin"}
+    ] + [
+        {"group_chat_id": group_chat.id, "user_id": user_id, "role": "member"}
+        for user_id in sorted(member_ids)
+    ])
+    await db.commit()
+    await db.refresh(group_chat)
+    return group_chat
+
 # Student routes
 @app.get("/student/leave-requests", response_model=List[LeaveRequestResponse])
-def get_my_leave_requests(
+async def get_my_leave_requests(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_student)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_student)
 ):
-    leave_requests = db.query(LeaveRequest).filter(
-        LeaveRequest.student_id == current_user.id
-    ).offset(skip).limit(limit).all()
+    leave_requests = await paginate(
+        db, select(LeaveRequest).filter(LeaveRequest.student_id == current_user.id),
+        LeaveRequest, response, skip, limit, cursor
+    )
     return leave_requests
 
 @app.post("/student/leave-requests", response_model=LeaveRequestResponse)
-def create_leave_request(
+async def create_leave_request(
     leave_request_data: LeaveRequestBase,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_student)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_student)
 ):
     if leave_request_data.start_date >= leave_request_data.end_date:
         raise HTTPException(
@@ -492,46 +3630,209 @@ def create_leave_request(
             detail="Start date cannot be in the past"
         )
     
+    overlapping_id = await db.scalar(
+        select(LeaveRequest.id).filter(
+            LeaveRequest.student_id == current_user.id,
+            LeaveRequest.start_date < leave_request_data.end_date,
+            LeaveRequest.end_date > leave_request_data.start_date,
+            LeaveRequest.status.in_(["pending", "approved"])
+        ).limit(1)
+    )
+    if overlapping_id is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Overlaps leave request {overlapping_id}"
+        )
+    
     db_leave_request = LeaveRequest(
         **leave_request_data.dict(),
         student_id=current_user.id
     )
     db.add(db_leave_request)
-    db.commit()
-    db.refresh(db_leave_request)
+    await db.commit()
+    await db.refresh(db_leave_request)
+    stats_cache.pop(("student", current_user.id))
     return db_leave_request
 
 @app.get("/student/dashboard/stats")
-def get_student_stats(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_student)
+async def get_student_stats(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_student)
 ):
-    total_leave_requests = db.query(LeaveRequest).filter(
-        LeaveRequest.student_id == current_user.id
-    ).count()
-    
-    pending_leave_requests = db.query(LeaveRequest).filter(
-        LeaveRequest.student_id == current_user.id,
-        LeaveRequest.status == "pending"
-    ).count()
+    key = ("student", current_user.id)
+    stats = stats_cache.get(key)
+    if stats is None:
+        row = (await db.execute(
+            select(
+                func.count(LeaveRequest.id),
+                func.coalesce(func.sum(case((LeaveRequest.status == "pending", 1), else_=0)), 0)
+            ).filter(LeaveRequest.student_id == current_user.id)
+        )).one()
+        stats = {
+            "total_leave_requests": row[0],
+            "pending_leave_requests": row[1],
+            "attendance": await get_attendance_summary(db, "student", current_user.id)
+        }
+        stats_cache.set(key, stats)
     
     return {
-        "total_leave_requests": total_leave_requests,
-        "pending_leave_requests": pending_leave_requests,
+        **stats,
         "current_location": current_user.current_location_id
     }
 
 # Common routes
-@app.get("/common/locations", response_model=List[LocationResponse])
-def get_active_locations(
+@app.get("/common/locations", response_model=List[LocationOccupancyResponse])
+async def get_active_locations(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    locations = db.query(Location).filter(Location.is_active == True).offset(skip).limit(limit).all()
-    return locations
+    key = location_list_key(request, current_user)
+    entry = location_responses.get(key)
+    if entry is None:
+        generation = location_responses.generation
+        locations = await paginate(
+            db, select(*LOCATION_RESPONSE_COLUMNS).filter(Location.is_active == True), Location,
+            response, skip, limit, cursor
+        )
+        entry = CachedLocationList([location._asdict() for location in locations], dict(response.headers))
+        location_responses.set_if_current(generation, key, entry)
+    return location_list_response(request, entry, with_occupancy=True)
+
+@app.get("/common/locations/occupancy/stream")
+async def stream_location_occupancy(token: str):
+    """Server-sent occupancy feed.
+
+    EventSource cannot set headers, so the bearer token is passed as ?token=.
+    The first "snapshot" event maps every occupied location id to its count;
+    each "occupancy" event after that carries only the counts that changed
+    since the previous one, so bursts of moves are coalesced per client.
+    """
+    async with AsyncSessionLocal() as db:
+        await authenticate_token(token, db)
+    listener = presence.listen()
+    
+    async def events():
+        try:
+            yield f"event: snapshot\ndata: {json.dumps(presence.counts())}\n\n"
+            while True:
+                try:
+                    await asyncio.wait_for(listener.changed.wait(), OCCUPANCY_STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                listener.changed.clear()
+                changes, listener.changes = listener.changes, {}
+                yield f"event: occupancy\ndata: {json.dumps(changes)}\n\n"
+        finally:
+            presence.unlisten(listener)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/common/group-chats", response_model=List[GroupChatResponse])
+async def get_my_group_chats(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    stmt = (
+        select(GroupChat)
+        .join(GroupChatMember, GroupChatMember.group_chat_id == GroupChat.id)
+        .filter(GroupChatMember.user_id == current_user.id, GroupChat.is_active == True)
+    )
+    return await paginate(db, stmt, GroupChat, response, skip, limit, cursor)
+
+@app.get("/common/group-chats/{group_chat_id}/messages", response_model=List[GroupChatMessageResponse])
+async def get_group_chat_messages(
+    group_chat_id: int,
+    response: Response,
+    skip: int = 0,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Newest first; X-Next-Cursor pages back through older messages."""
+    await get_group_chat_for_member(db, group_chat_id, current_user)
+    return await paginate(
+        db, select(GroupChatMessage).filter(GroupChatMessage.group_chat_id == group_chat_id),
+        GroupChatMessage, response, skip, limit, cursor, descending=True
+    )
+
+@app.post("/common/group-chats/{group_chat_id}/messages", response_model=GroupChatMessageResponse)
+async def send_group_chat_message(
+    group_chat_id: int,
+    message_data: GroupChatMessageCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    await get_group_chat_for_member(db, group_chat_id, current_user)
+    return await post_group_chat_message(db, group_chat_id, current_user.id, message_data.body)
+
+@app.websocket("/common/group-chats/{group_chat_id}/ws")
+async def group_chat_socket(websocket: WebSocket, group_chat_id: int, token: str):
+    """Live group chat.
+
+    The bearer token is passed as ?token= as for live roll calls. The server
+    pushes {"type": "message", "message": {...}} for every new message in the
+    chat; clients send {"type": "send", "body": "..."} (or use the POST route)
+    and fetch anything older from the history route.
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            current_user = await authenticate_token(token, db)
+            await get_group_chat_for_member(db, group_chat_id, current_user)
+        except HTTPException as exc:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=exc.detail)
+            return
+    
+    await websocket.accept()
+    topic = chat_topic(group_chat_id)
+    queue = pubsub_hub.subscribe(topic)
+    
+    # Only this task writes to the socket; errors go through the same queue
+    async def forward():
+        while True:
+            await websocket.send_text(await queue.get())
+    
+    def reply_error(detail):
+        try:
+            queue.put_nowait(json.dumps({"type": "error", "detail": detail}))
+        except asyncio.QueueFull:
+            pass
+    
+    forwarder = asyncio.create_task(forward())
+    try:
+        while True:
+            message = await websocket.receive_json()
+            message_type = message.get("type") if isinstance(message, dict) else None
+            if message_type == "send":
+                try:
+                    message_data = GroupChatMessageCreate(body=message.get("body"))
+                except ValidationError as exc:
+                    reply_error(exc.errors(include_url=False, include_context=False))
+                    continue
+                async with AsyncSessionLocal() as db:
+                    await post_group_chat_message(db, group_chat_id, current_user.id, message_data.body)
+            else:
+                reply_error("Unknown message type")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        forwarder.cancel()
+        pubsub_hub.unsubscribe(topic, queue)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)
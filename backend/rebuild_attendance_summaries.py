@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Attendance summary rebuild script for Student Life Management System
+Recomputes attendance_summaries from roll_call_entries, e.g. after entries
+were edited by hand or summaries drifted
+"""
+
+import asyncio
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from main import AsyncSessionLocal, async_engine, rebuild_attendance_summaries
+
+async def rebuild():
+    """Rebuild every summary row in one transaction"""
+    try:
+        async with AsyncSessionLocal() as db:
+            written = await rebuild_attendance_summaries(db)
+    finally:
+        await async_engine.dispose()
+    for scope, rows in written.items():
+        print(f"✅ {rows} {scope} summaries rebuilt")
+
+if __name__ == "__main__":
+    asyncio.run(rebuild())
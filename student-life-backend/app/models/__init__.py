@@ -1,19 +1,27 @@
 from app.core.database import Base
 from .user import User
 from .location import Location
+from .location_history import LocationEvent, LocationHourly
 from .role import Role
-from .group_chat import GroupChat, GroupChatMember
+from .group_chat import GroupChat, GroupChatMember, GroupChatMessage
 from .leave_request import LeaveRequest
 from .roll_call import RollCall, RollCallEntry
+from .attendance_summary import AttendanceSummary
+from .scheduler_lease import SchedulerLease
 
 __all__ = [
     "Base",
     "User",
     "Location", 
+    "LocationEvent",
+    "LocationHourly",
     "Role",
     "GroupChat",
     "GroupChatMember",
+    "GroupChatMessage",
     "LeaveRequest",
     "RollCall",
-    "RollCallEntry"
+    "RollCallEntry",
+    "AttendanceSummary",
+    "SchedulerLease"
 ] 
\ No newline at end of file
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String
+from app.core.database import Base
+
+class AttendanceSummary(Base):
+    """Entry counts by status for one student, roll call or instructor (scope, scope_id)."""
+    __tablename__ = "attendance_summaries"
+    
+    scope = Column(String, primary_key=True)
+    scope_id = Column(Integer, primary_key=True)
+    present = Column(Integer, nullable=False, default=0)
+    late = Column(Integer, nullable=False, default=0)
+    absent = Column(Integer, nullable=False, default=0)
+    excused = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<AttendanceSummary(scope='{self.scope}', scope_id={self.scope_id})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -23,6 +23,10 @@ class GroupChat(Base):
 
 class GroupChatMember(Base):
     __tablename__ = "group_chat_members"
+    __table_args__ = (
+        Index("ix_group_chat_members_group_chat_id_user_id", "group_chat_id", "user_id", unique=True),
+        Index("ix_group_chat_members_user_id", "user_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     group_chat_id = Column(Integer, ForeignKey("group_chats.id"), nullable=False)
@@ -35,4 +39,20 @@ class GroupChatMember(Base):
     user = relationship("User", back_populates="group_chat_memberships")
     
     def __repr__(self):
-        return f"<GroupChatMember(group_chat_id={self.group_chat_id}, user_id={self.user_id})>" 
\ No newline at end of file
+        return f"<GroupChatMember(group_chat_id={self.group_chat_id}, user_id={self.user_id})>"
+
+class GroupChatMessage(Base):
+    """Append-only: messages are never updated or deleted."""
+    __tablename__ = "group_chat_messages"
+    __table_args__ = (
+        Index("ix_group_chat_messages_group_chat_id_id", "group_chat_id", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    group_chat_id = Column(Integer, ForeignKey("group_chats.id"), nullable=False)
+    sender_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    body = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<GroupChatMessage(id={self.id}, group_chat_id={self.group_chat_id})>" 
\ No newline at end of file
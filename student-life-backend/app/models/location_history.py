@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, Index
+from app.core.database import Base
+
+class LocationEvent(Base):
+    """Append-only move log: integer ids and epoch seconds only.
+
+    No foreign keys, so the history outlives deleted users and locations.
+    """
+    __tablename__ = "location_events"
+    __table_args__ = (
+        Index("ix_location_events_student_id_ts", "student_id", "ts"),
+        Index("ix_location_events_location_id_ts", "location_id", "ts"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    student_id = Column(Integer, nullable=False)
+    location_id = Column(Integer, nullable=False)
+    ts = Column(Integer, nullable=False)
+    
+    def __repr__(self):
+        return f"<LocationEvent(student_id={self.student_id}, location_id={self.location_id}, ts={self.ts})>"
+
+class LocationHourly(Base):
+    """Compacted location events: one row per student, location and hour."""
+    __tablename__ = "location_hourly"
+    __table_args__ = (
+        Index("ix_location_hourly_location_id_hour_ts", "location_id", "hour_ts"),
+    )
+    
+    student_id = Column(Integer, primary_key=True)
+    hour_ts = Column(Integer, primary_key=True)
+    location_id = Column(Integer, primary_key=True)
+    events = Column(Integer, nullable=False)
+    first_ts = Column(Integer, nullable=False)
+    last_ts = Column(Integer, nullable=False)
+    
+    def __repr__(self):
+        return f"<LocationHourly(student_id={self.student_id}, location_id={self.location_id}, hour_ts={self.hour_ts})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -12,6 +12,10 @@ class RollCallStatus(str, Enum):
 
 class RollCall(Base):
     __tablename__ = "roll_calls"
+    __table_args__ = (
+        Index("ix_roll_calls_conducted_by", "conducted_by"),
+        Index("ix_roll_calls_activated_at_scheduled_time", "activated_at", "scheduled_time"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -19,6 +23,7 @@ class RollCall(Base):
     location_id = Column(Integer, ForeignKey("locations.id"), nullable=True)
     conducted_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     scheduled_time = Column(DateTime, nullable=False)
+    activated_at = Column(DateTime, nullable=True)
     conducted_at = Column(DateTime(timezone=True), nullable=True)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -34,6 +39,10 @@ class RollCall(Base):
 
 class RollCallEntry(Base):
     __tablename__ = "roll_call_entries"
+    __table_args__ = (
+        Index("ix_roll_call_entries_roll_call_id_student_id", "roll_call_id", "student_id", unique=True),
+        Index("ix_roll_call_entries_student_id", "student_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     roll_call_id = Column(Integer, ForeignKey("roll_calls.id"), nullable=False)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, DateTime
+from app.core.database import Base
+
+class SchedulerLease(Base):
+    """Which worker runs a background job; a holder keeps it by renewing before expires_at."""
+    __tablename__ = "scheduler_leases"
+    
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f"<SchedulerLease(name='{self.name}', holder='{self.holder}')>"
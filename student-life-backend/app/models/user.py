@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -11,6 +11,9 @@ class UserRole(str, Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_role", "role"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
@@ -32,13 +35,14 @@ class User(Base):
     
     # Relationships
     current_location_id = Column(Integer, ForeignKey("locations.id"), nullable=True)
+    location_updated_at = Column(DateTime, nullable=True)  # UTC time of the last move or gate scan
     current_location = relationship("Location", foreign_keys=[current_location_id])
     
     # Roll call entries
-    roll_call_entries = relationship("RollCallEntry", back_populates="student")
+    roll_call_entries = relationship("RollCallEntry", foreign_keys="RollCallEntry.student_id", back_populates="student")
     
     # Leave requests (for students)
-    leave_requests = relationship("LeaveRequest", back_populates="student")
+    leave_requests = relationship("LeaveRequest", foreign_keys="LeaveRequest.student_id", back_populates="student")
     
     # Group chat memberships
     group_chat_memberships = relationship("GroupChatMember", back_populates="user")
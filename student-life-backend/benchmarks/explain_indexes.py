@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Index benchmark for the Student Life Management System
+
+Seeds a throwaway SQLite database with 100k users, then prints EXPLAIN QUERY
+PLAN output and timings for the hot filter queries before and after running
+the Alembic index migration.
+
+Usage:
+    python benchmarks/explain_indexes.py [--users 100000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="slms-bench-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, BACKEND_DIR)
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+from app.core.database import engine
+from app.models import Base, User, Location, LeaveRequest, RollCall, RollCallEntry, GroupChat, GroupChatMember
+
+QUERIES = {
+    "students by role": "SELECT count(*) FROM users WHERE role = 'student'",
+    "leave requests by student/status": (
+        "SELECT count(*) FROM leave_requests WHERE student_id = 4242 AND status = 'pending'"
+    ),
+    "roll calls by instructor": "SELECT count(*) FROM roll_calls WHERE conducted_by = 7",
+    "roll call entry lookup": (
+        "SELECT * FROM roll_call_entries WHERE roll_call_id = 123 AND student_id = 4242"
+    ),
+    "active locations": "SELECT * FROM locations WHERE is_active = 1",
+    "chat members": "SELECT user_id FROM group_chat_members WHERE group_chat_id = 17",
+    "chats for user": "SELECT group_chat_id FROM group_chat_members WHERE user_id = 4242",
+}
+
+def seed(num_users: int):
+    """Bulk insert a realistic spread of rows without going through the ORM."""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    num_instructors = max(num_users // 50, 1)
+    users = []
+    for i in range(1, num_users + 1):
+        role = "instructor" if i <= num_instructors else "student"
+        users.append({
+            "id": i,
+            "email": f"user{i}@school.edu",
+            "username": f"user{i}",
+            "full_name": f"User {i}",
+            "hashed_password": "x",
+            "role": role,
+            "is_active": True,
+        })
+    locations = [
+        {"id": i, "name": f"Location {i}", "is_active": i % 5 != 0} for i in range(1, 201)
+    ]
+    leave_requests = [
+        {
+            "student_id": rng.randint(num_instructors + 1, num_users),
+            "reason": "bench",
+            "start_date": now,
+            "end_date": now + timedelta(days=1),
+            "status": rng.choice(["pending", "approved", "rejected"]),
+        }
+        for _ in range(num_users // 2)
+    ]
+    roll_calls = [
+        {
+            "id": i,
+            "name": f"Roll call {i}",
+            "conducted_by": rng.randint(1, num_instructors),
+            "scheduled_time": now,
+        }
+        for i in range(1, 2001)
+    ]
+    entries = [
+        {
+            "roll_call_id": rc,
+            "student_id": sid,
+            "status": "present",
+        }
+        for rc in range(1, 201)
+        for sid in range(num_instructors + 1, num_instructors + 501)
+    ]
+    chats = [{"id": i, "name": f"Chat {i}", "created_by": 1} for i in range(1, 101)]
+    members = [
+        {"group_chat_id": chat, "user_id": uid}
+        for chat in range(1, 101)
+        for uid in rng.sample(range(1, num_users + 1), 200)
+    ]
+    with engine.begin() as conn:
+        for model, rows in (
+            (User, users), (Location, locations), (LeaveRequest, leave_requests),
+            (RollCall, roll_calls), (RollCallEntry, entries), (GroupChat, chats),
+            (GroupChatMember, members),
+        ):
+            conn.execute(model.__table__.insert(), rows)
+        conn.execute(text("ANALYZE"))
+
+def report(label: str):
+    print(f"\n=== {label} ===")
+    with engine.connect() as conn:
+        for name, sql in QUERIES.items():
+            plan = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+            start = time.perf_counter()
+            for _ in range(20):
+                conn.execute(text(sql)).fetchall()
+            elapsed = (time.perf_counter() - start) / 20 * 1000
+            print(f"{name:<36} {elapsed:8.3f} ms")
+            for row in plan:
+                print(f"    {row[-1]}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100_000)
+    args = parser.parse_args()
+
+    alembic_cfg = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    alembic_cfg.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+
+    print(f"Database: {DB_PATH}")
+    Base.metadata.create_all(bind=engine)
+    command.stamp(alembic_cfg, "head")
+    command.downgrade(alembic_cfg, "base")
+
+    print(f"Seeding {args.users} users...")
+    seed(args.users)
+    report("Before migration")
+
+    command.upgrade(alembic_cfg, "head")
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    report("After migration")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""Add secondary and composite indexes for hot filter paths
+
+Tables are created by Base.metadata.create_all on startup, so this revision
+only adds the indexes and is safe to run against a database where some of
+them already exist.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_users_role", "users", ["role"], False),
+    ("ix_locations_is_active", "locations", ["is_active"], False),
+    ("ix_leave_requests_student_id_status", "leave_requests", ["student_id", "status"], False),
+    ("ix_roll_calls_conducted_by", "roll_calls", ["conducted_by"], False),
+    ("ix_roll_call_entries_roll_call_id_student_id", "roll_call_entries", ["roll_call_id", "student_id"], True),
+    ("ix_roll_call_entries_student_id", "roll_call_entries", ["student_id"], False),
+    ("ix_group_chat_members_group_chat_id_user_id", "group_chat_members", ["group_chat_id", "user_id"], True),
+    ("ix_group_chat_members_user_id", "group_chat_members", ["user_id"], False),
+]
+
+def upgrade():
+    for name, table, columns, unique in INDEXES:
+        op.create_index(name, table, columns, unique=unique, if_not_exists=True)
+
+def downgrade():
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
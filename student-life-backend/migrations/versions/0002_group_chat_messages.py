@@ -0,0 +1,32 @@
+"""Add the append-only group chat message store
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "group_chat_messages",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("group_chat_id", sa.Integer, sa.ForeignKey("group_chats.id"), nullable=False),
+        sa.Column("sender_id", sa.Integer, sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("body", sa.Text, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_group_chat_messages_group_chat_id_id", "group_chat_messages",
+        ["group_chat_id", "id"], if_not_exists=True
+    )
+
+def downgrade():
+    op.drop_index("ix_group_chat_messages_group_chat_id_id", table_name="group_chat_messages", if_exists=True)
+    op.drop_table("group_chat_messages", if_exists=True)
@@ -0,0 +1,25 @@
+"""Track when each student's location last changed
+
+Gate scanner check-ins only apply when they are newer than this timestamp,
+which makes retried batches idempotent.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("users")}
+    if "location_updated_at" not in columns:
+        op.add_column("users", sa.Column("location_updated_at", sa.DateTime, nullable=True))
+
+def downgrade():
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("location_updated_at")
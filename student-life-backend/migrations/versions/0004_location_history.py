@@ -0,0 +1,45 @@
+"""Add the location event log and its hourly rollup
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "location_events",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("student_id", sa.Integer, nullable=False),
+        sa.Column("location_id", sa.Integer, nullable=False),
+        sa.Column("ts", sa.Integer, nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index("ix_location_events_student_id_ts", "location_events", ["student_id", "ts"], if_not_exists=True)
+    op.create_index("ix_location_events_location_id_ts", "location_events", ["location_id", "ts"], if_not_exists=True)
+    op.create_table(
+        "location_hourly",
+        sa.Column("student_id", sa.Integer, primary_key=True),
+        sa.Column("hour_ts", sa.Integer, primary_key=True),
+        sa.Column("location_id", sa.Integer, primary_key=True),
+        sa.Column("events", sa.Integer, nullable=False),
+        sa.Column("first_ts", sa.Integer, nullable=False),
+        sa.Column("last_ts", sa.Integer, nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_location_hourly_location_id_hour_ts", "location_hourly", ["location_id", "hour_ts"], if_not_exists=True
+    )
+
+def downgrade():
+    op.drop_index("ix_location_hourly_location_id_hour_ts", table_name="location_hourly", if_exists=True)
+    op.drop_table("location_hourly", if_exists=True)
+    op.drop_index("ix_location_events_location_id_ts", table_name="location_events", if_exists=True)
+    op.drop_index("ix_location_events_student_id_ts", table_name="location_events", if_exists=True)
+    op.drop_table("location_events", if_exists=True)
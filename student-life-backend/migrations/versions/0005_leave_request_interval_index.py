@@ -0,0 +1,21 @@
+"""Index leave requests by student and date range for overlap checks
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index(
+        "ix_leave_requests_student_id_start_date_end_date", "leave_requests",
+        ["student_id", "start_date", "end_date"], if_not_exists=True
+    )
+
+def downgrade():
+    op.drop_index("ix_leave_requests_student_id_start_date_end_date", table_name="leave_requests", if_exists=True)
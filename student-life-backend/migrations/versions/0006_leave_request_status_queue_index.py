@@ -0,0 +1,18 @@
+"""Index leave requests by status and id for the pending approval queue
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index("ix_leave_requests_status_id", "leave_requests", ["status", "id"], if_not_exists=True)
+
+def downgrade():
+    op.drop_index("ix_leave_requests_status_id", table_name="leave_requests", if_exists=True)
@@ -0,0 +1,46 @@
+"""Track roll-call activation and add the scheduler lease table
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+from datetime import datetime
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("roll_calls")}
+    if "activated_at" not in columns:
+        op.add_column("roll_calls", sa.Column("activated_at", sa.DateTime, nullable=True))
+    op.create_index(
+        "ix_roll_calls_activated_at_scheduled_time", "roll_calls", ["activated_at", "scheduled_time"],
+        if_not_exists=True
+    )
+    # Roll calls that were already due count as activated; otherwise the
+    # scheduler would activate (and fill the roster of) every old one
+    op.get_bind().execute(
+        sa.text(
+            "UPDATE roll_calls SET activated_at = COALESCE(conducted_at, scheduled_time) "
+            "WHERE activated_at IS NULL AND scheduled_time < :now"
+        ),
+        {"now": datetime.utcnow()}
+    )
+    op.create_table(
+        "scheduler_leases",
+        sa.Column("name", sa.String, primary_key=True),
+        sa.Column("holder", sa.String, nullable=False),
+        sa.Column("expires_at", sa.DateTime, nullable=False),
+        if_not_exists=True,
+    )
+
+def downgrade():
+    op.drop_table("scheduler_leases", if_exists=True)
+    op.drop_index("ix_roll_calls_activated_at_scheduled_time", table_name="roll_calls", if_exists=True)
+    with op.batch_alter_table("roll_calls") as batch_op:
+        batch_op.drop_column("activated_at")
@@ -0,0 +1,45 @@
+"""Add attendance summaries and fill them from existing roll-call entries
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+COUNTS = ", ".join(
+    f"SUM(CASE WHEN e.status = '{status}' THEN 1 ELSE 0 END)"
+    for status in ("present", "late", "absent", "excused")
+)
+# Generated "present" entries count once an instructor confirms them
+CONFIRMED = "(e.status <> 'present' OR e.marked_by IS NOT NULL)"
+
+def upgrade():
+    op.create_table(
+        "attendance_summaries",
+        sa.Column("scope", sa.String, primary_key=True),
+        sa.Column("scope_id", sa.Integer, primary_key=True),
+        sa.Column("present", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("late", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("absent", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("excused", sa.Integer, nullable=False, server_default="0"),
+        if_not_exists=True,
+    )
+    op.execute("DELETE FROM attendance_summaries")
+    for scope, key, source in (
+        ("student", "e.student_id", "roll_call_entries e"),
+        ("roll_call", "e.roll_call_id", "roll_call_entries e"),
+        ("instructor", "r.conducted_by", "roll_call_entries e JOIN roll_calls r ON r.id = e.roll_call_id"),
+    ):
+        op.execute(
+            "INSERT INTO attendance_summaries (scope, scope_id, present, late, absent, excused) "
+            f"SELECT '{scope}', {key}, {COUNTS} FROM {source} WHERE {CONFIRMED} GROUP BY {key}"
+        )
+
+def downgrade():
+    op.drop_table("attendance_summaries", if_exists=True)
@@ -0,0 +1,25 @@
+"""Record when a leave request was approved or rejected
+
+backend's leave_requests table was created without approved_at; the
+student-life models always had it, so the column is only added when missing.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("leave_requests")}
+    if "approved_at" not in columns:
+        op.add_column("leave_requests", sa.Column("approved_at", sa.DateTime(timezone=True), nullable=True))
+
+def downgrade():
+    with op.batch_alter_table("leave_requests") as batch_op:
+        batch_op.drop_column("approved_at")